@@ -60,3 +60,256 @@ for valores in itertools.product(dominio, repeat=len(cutset)):
             break
 else:
     print("❌ No se pudo encontrar una combinación válida. Quedaste atrapado 💀")
+
+
+# ============================================================================
+# 🤖 Acondicionamiento del corte AUTOMÁTICO
+# En lugar de elegir el cutset a mano y probar el resto con fuerza bruta:
+#   1. Detectamos un cutset pequeño que deja el grafo de restricciones sin ciclos
+#   2. Cada asignación del cutset deja un CSP con forma de árbol (bosque), que se
+#      resuelve en tiempo lineal con consistencia de arco direccional (DAC)
+#   3. Repartimos las asignaciones del cutset entre varios procesos
+# ============================================================================
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+# 🕸️ Grafo de restricciones: cada conflicto une a dos puertas
+def construir_grafo(variables, conflictos):
+    vecinos = {v: set() for v in variables}
+    for (p1, _, p2, _) in conflictos:
+        if p1 != p2:
+            vecinos[p1].add(p2)
+            vecinos[p2].add(p1)
+    return vecinos
+
+
+# 🔎 Heurística voraz: quitamos hojas (grado <= 1) mientras se pueda; si queda un
+# ciclo, la variable de mayor grado pasa al cutset y repetimos
+def detectar_cutset(variables, vecinos):
+    grafo = {v: set(vecinos[v]) for v in variables}
+    cutset_auto = []
+
+    def quitar(v):
+        for u in grafo.pop(v):
+            grafo[u].discard(v)
+
+    while grafo:
+        hojas = [v for v in grafo if len(grafo[v]) <= 1]
+        if hojas:
+            for v in hojas:
+                if v in grafo:
+                    quitar(v)
+            continue
+        elegida = max(grafo, key=lambda v: (len(grafo[v]), v))
+        cutset_auto.append(elegida)
+        quitar(elegida)
+
+    # Orden original de las variables para que la salida sea estable
+    return [v for v in variables if v in cutset_auto]
+
+
+# 🚫 Índice de parejas prohibidas en ambas direcciones
+def indexar_conflictos(conflictos):
+    prohibidos = set()
+    for (p1, v1, p2, v2) in conflictos:
+        prohibidos.add((p1, v1, p2, v2))
+        prohibidos.add((p2, v2, p1, v1))
+    return prohibidos
+
+
+def compatibles(prohibidos, x, vx, y, vy):
+    return (x, vx, y, vy) not in prohibidos
+
+
+# 🌳 Ordena cada componente del bosque desde una raíz (padre antes que hijo)
+def ordenar_bosque(variables, vecinos, excluidas):
+    orden, padre = [], {}
+    visitadas = set(excluidas)
+    for raiz in variables:
+        if raiz in visitadas:
+            continue
+        visitadas.add(raiz)
+        padre[raiz] = None
+        cola = deque([raiz])
+        while cola:
+            v = cola.popleft()
+            orden.append(v)
+            for u in sorted(vecinos[v]):
+                if u not in visitadas:
+                    visitadas.add(u)
+                    padre[u] = v
+                    cola.append(u)
+    return orden, padre
+
+
+# 🧹 Consistencia de arco direccional: de las hojas a la raíz, cada padre se queda
+# solo con valores que tienen soporte en el hijo. Tras esto el árbol se resuelve
+# sin retroceso. Devuelve None si algún dominio se vacía.
+def consistencia_direccional(orden, padre, dominios, prohibidos):
+    for hijo in reversed(orden):
+        p = padre[hijo]
+        if p is None:
+            continue
+        dominios[p] = [vp for vp in dominios[p]
+                       if any(compatibles(prohibidos, p, vp, hijo, vh) for vh in dominios[hijo])]
+        if not dominios[p]:
+            return None
+    return dominios
+
+
+# 🌲 Resuelve el resto (un bosque) condicionado a una asignación del cutset
+def resolver_arbol(problema, asignacion_cutset, todas=False):
+    variables, dominio_base, vecinos, prohibidos, orden, padre = problema
+
+    # Podamos los dominios con los valores fijados en el cutset
+    dominios = {}
+    for v in orden:
+        dominios[v] = [x for x in dominio_base
+                       if all(compatibles(prohibidos, v, x, c, vc)
+                              for c, vc in asignacion_cutset.items() if c in vecinos[v])]
+        if not dominios[v]:
+            return []
+
+    if consistencia_direccional(orden, padre, dominios, prohibidos) is None:
+        return []
+
+    # Asignación de la raíz a las hojas: siempre hay soporte, no hay retroceso
+    def candidatos(v, asignacion):
+        p = padre[v]
+        if p is None:
+            return dominios[v]
+        return [x for x in dominios[v] if compatibles(prohibidos, v, x, p, asignacion[p])]
+
+    if not todas:
+        asignacion = dict(asignacion_cutset)
+        for v in orden:
+            asignacion[v] = candidatos(v, asignacion)[0]
+        return [asignacion]
+
+    soluciones = []
+
+    def enumerar(i, asignacion):
+        if i == len(orden):
+            soluciones.append(dict(asignacion))
+            return
+        v = orden[i]
+        for x in candidatos(v, asignacion):
+            asignacion[v] = x
+            enumerar(i + 1, asignacion)
+        del asignacion[v]
+
+    enumerar(0, dict(asignacion_cutset))
+    return soluciones
+
+
+# 🧑‍🏭 Cada proceso recibe el problema una sola vez (initializer) y luego bloques
+# de asignaciones del cutset
+_problema_proceso = None
+
+
+def _iniciar_proceso(problema):
+    global _problema_proceso
+    _problema_proceso = problema
+
+
+def _resolver_bloque(cutset_vars, bloque, todas):
+    variables, _, vecinos, prohibidos, _, _ = _problema_proceso
+    soluciones = []
+    for valores in bloque:
+        asignacion = dict(zip(cutset_vars, valores))
+        # Descartamos pronto asignaciones del cutset que ya chocan entre sí
+        if any(not compatibles(prohibidos, a, asignacion[a], b, asignacion[b])
+               for a in cutset_vars for b in vecinos[a] if b in asignacion):
+            continue
+        encontradas = resolver_arbol(_problema_proceso, asignacion, todas)
+        soluciones.extend(encontradas)
+        if encontradas and not todas:
+            break
+    return soluciones, len(bloque)
+
+
+def _bloques(iterable, tam):
+    bloque = []
+    for x in iterable:
+        bloque.append(x)
+        if len(bloque) == tam:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# 🚀 Solver completo: detecta cutset, reparte y devuelve (soluciones, estadísticas)
+def resolver_con_corte(variables, dominio, conflictos, todas=False, procesos=None, tam_bloque=64):
+    t0 = time.perf_counter()
+    vecinos = construir_grafo(variables, conflictos)
+    cutset_auto = detectar_cutset(variables, vecinos)
+    prohibidos = indexar_conflictos(conflictos)
+    orden, padre = ordenar_bosque(variables, vecinos, cutset_auto)
+    problema = (variables, list(dominio), vecinos, prohibidos, orden, padre)
+    t_deteccion = time.perf_counter() - t0
+
+    asignaciones = itertools.product(dominio, repeat=len(cutset_auto))
+    soluciones, evaluadas = [], 0
+
+    if procesos == 1:
+        _iniciar_proceso(problema)
+        for bloque in _bloques(asignaciones, tam_bloque):
+            encontradas, n = _resolver_bloque(cutset_auto, bloque, todas)
+            soluciones.extend(encontradas)
+            evaluadas += n
+            if soluciones and not todas:
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(problema,)) as pool:
+            bloques = _bloques(asignaciones, tam_bloque)
+            pendientes = set()
+            limite = 4 * (procesos or os.cpu_count() or 1)  # No encolamos todo el producto de golpe
+            terminado = False
+            while not terminado or pendientes:
+                while not terminado and len(pendientes) < limite:
+                    bloque = next(bloques, None)
+                    if bloque is None:
+                        terminado = True
+                        break
+                    pendientes.add(pool.submit(_resolver_bloque, cutset_auto, bloque, todas))
+                if not pendientes:
+                    break
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    encontradas, n = futuro.result()
+                    soluciones.extend(encontradas)
+                    evaluadas += n
+                if soluciones and not todas:
+                    for futuro in pendientes:
+                        futuro.cancel()
+                    pendientes = set()
+                    terminado = True
+
+    if not todas:
+        soluciones = soluciones[:1]
+
+    estadisticas = {
+        "cutset": cutset_auto,
+        "asignaciones_cutset": evaluadas,
+        "soluciones": len(soluciones),
+        "tiempo_deteccion": t_deteccion,
+        "tiempo_total": time.perf_counter() - t0,
+    }
+    return soluciones, estadisticas
+
+
+if __name__ == "__main__":
+    print("\n🤖 Acondicionamiento del corte automático")
+    sols, stats = resolver_con_corte(puertas, dominio, conflictos, procesos=2)
+    print(f"🪓 Cutset detectado: {stats['cutset']}")
+    if sols:
+        for puerta in puertas:
+            print(f"🚪 {puerta} ➡️ Código {sols[0][puerta]}")
+    sols, stats = resolver_con_corte(puertas, dominio, conflictos, todas=True, procesos=2)
+    print(f"📊 {stats['soluciones']} soluciones, {stats['asignaciones_cutset']} asignaciones del cutset, "
+          f"{stats['tiempo_total'] * 1000:.1f} ms")
@@ -1,6 +1,9 @@
 # Importamos la librería random que nos permitirá generar valores aleatorios
 import random
 
+# NumPy nos permite evaluar millones de decisiones con operaciones matriciales
+import numpy as np
+
 # 🧪 Ponderación de prioridades: cuánto valora la colonia cada factor
 # Aquí estamos definiendo qué tan importante es cada criterio para la colonia.
 # La vida tiene el mayor peso (0.5), seguido por moral (0.2), tecnología (0.2), y recursos (0.1).
@@ -125,7 +128,128 @@ def simular_decisiones():
     # Retorna la mejor decisión (la de mayor utilidad esperada).
     return mejores_opciones[0][0]
 
+# 🧮 Modelo de utilidad matricial para tablas de decisión grandes
+# Cuando hay millones de decisiones candidatas que comparten los mismos resultados posibles,
+# recorrer diccionarios decisión por decisión es demasiado lento. Aquí todo vive en arreglos:
+#   - U: matriz (resultados × atributos) con la utilidad de cada resultado en cada factor
+#   - w: vector (atributos) con los pesos de la colonia
+#   - P: matriz (decisiones × resultados) con la distribución de resultados de cada decisión
+# La utilidad esperada de TODAS las decisiones es P @ (U @ w): un único producto de matrices.
+class ModeloUtilidadMatricial:
+    def __init__(self, probabilidades, utilidades, pesos, nombres=None, tam_bloque=262144):
+        # Guardamos las matrices como float64 contiguas para que NumPy trabaje sin copias extra.
+        self.P = np.ascontiguousarray(probabilidades, dtype=np.float64)
+        self.U = np.ascontiguousarray(utilidades, dtype=np.float64)
+        self.w = np.ascontiguousarray(pesos, dtype=np.float64)
+        if self.P.shape[1] != self.U.shape[0] or self.U.shape[1] != self.w.shape[0]:
+            raise ValueError("Dimensiones incompatibles entre decisiones, resultados y atributos")
+        self.nombres = nombres
+        # Número de decisiones que se evalúan a la vez en top_k y en el muestreo.
+        self.tam_bloque = tam_bloque
+        # La utilidad ponderada de cada resultado solo depende de U y w: se calcula una sola vez.
+        self.u_resultado = self.U @ self.w
+
+    @classmethod
+    def desde_diccionario(cls, decisiones, pesos):
+        # Convierte el formato de DECISIONES/PESOS en matrices. Cada resultado distinto
+        # (nombre + vector de utilidades) ocupa una columna compartida por todas las decisiones.
+        atributos = list(pesos)
+        indice, filas_u = {}, []
+        filas_p = []
+        for decision in decisiones:
+            fila = {}
+            for evento in decisiones[decision]:
+                vector = tuple(evento["utilidad"][a] for a in atributos)
+                clave = (evento["resultado"], vector)
+                if clave not in indice:
+                    indice[clave] = len(filas_u)
+                    filas_u.append(vector)
+                fila[indice[clave]] = fila.get(indice[clave], 0.0) + evento["probabilidad"]
+            filas_p.append(fila)
+        P = np.zeros((len(filas_p), len(filas_u)))
+        for i, fila in enumerate(filas_p):
+            for j, p in fila.items():
+                P[i, j] = p
+        return cls(P, np.array(filas_u), [pesos[a] for a in atributos], nombres=list(decisiones))
+
+    def utilidades_esperadas(self):
+        # Utilidad esperada de todas las decisiones con un solo producto matriz-vector.
+        return self.P @ self.u_resultado
+
+    def top_k(self, k):
+        # Devuelve las k mejores decisiones (índice, utilidad) sin ordenar la lista completa:
+        # por bloques, argpartition selecciona candidatos y solo se ordenan k al final.
+        k = max(0, min(k, self.P.shape[0]))
+        if k == 0:
+            return []
+        mejores_idx = np.empty(0, dtype=np.int64)
+        mejores_val = np.empty(0)
+        for inicio in range(0, self.P.shape[0], self.tam_bloque):
+            valores = self.P[inicio:inicio + self.tam_bloque] @ self.u_resultado
+            idx = np.arange(inicio, inicio + len(valores))
+            valores = np.concatenate([mejores_val, valores])
+            idx = np.concatenate([mejores_idx, idx])
+            if len(valores) > k:
+                sel = np.argpartition(valores, len(valores) - k)[-k:]
+                valores, idx = valores[sel], idx[sel]
+            mejores_val, mejores_idx = valores, idx
+        orden = np.argsort(-mejores_val, kind="stable")
+        return [(self._nombre(i), v) for i, v in zip(mejores_idx[orden], mejores_val[orden])]
+
+    def _nombre(self, i):
+        return self.nombres[i] if self.nombres is not None else int(i)
+
+    def muestrear_utilidad(self, n_muestras, tam_lote=1024, semilla=None):
+        # Estimación Monte Carlo de la utilidad de cada decisión. Se muestrean resultados
+        # en lotes de tam_lote y solo se acumulan sumas y sumas de cuadrados, así la memoria
+        # no crece con n_muestras. Devuelve (media, error estándar) por decisión.
+        rng = np.random.default_rng(semilla)
+        n_dec, n_res = self.P.shape
+        suma = np.zeros(n_dec)
+        suma_cuadrados = np.zeros(n_dec)
+        filas_bloque = max(1, self.tam_bloque // tam_lote)
+        for inicio in range(0, n_dec, filas_bloque):
+            P = self.P[inicio:inicio + filas_bloque]
+            m = len(P)
+            # CDF de cada fila desplazada por su índice: así un único searchsorted sirve para todas.
+            acumulada = np.cumsum(P, axis=1)
+            acumulada /= acumulada[:, -1:]
+            desplazamiento = np.arange(m)[:, None]
+            plana = (acumulada + desplazamiento).ravel()
+            restantes = n_muestras
+            while restantes > 0:
+                lote = min(tam_lote, restantes)
+                u = rng.random((m, lote)) + desplazamiento
+                resultado = np.searchsorted(plana, u.ravel(), side="right").reshape(m, lote)
+                resultado = np.minimum(resultado - desplazamiento * n_res, n_res - 1)
+                utilidad = self.u_resultado[resultado]
+                suma[inicio:inicio + m] += utilidad.sum(axis=1)
+                suma_cuadrados[inicio:inicio + m] += (utilidad ** 2).sum(axis=1)
+                restantes -= lote
+        media = suma / n_muestras
+        varianza = np.maximum(suma_cuadrados / n_muestras - media ** 2, 0.0)
+        return media, np.sqrt(varianza / n_muestras)
+
+# 🛰️ Simulador masivo: muchas decisiones candidatas que comparten los mismos resultados
+def simular_decisiones_masivas(n_decisiones=200000, k=5, semilla=2189):
+    print(f"\n🛰️ Evaluando {n_decisiones} planes candidatos con el modelo matricial")
+    modelo_base = ModeloUtilidadMatricial.desde_diccionario(DECISIONES, PESOS)
+
+    # Cada plan candidato es una mezcla aleatoria de los resultados conocidos.
+    rng = np.random.default_rng(semilla)
+    P = rng.dirichlet(np.ones(modelo_base.U.shape[0]), size=n_decisiones)
+    modelo = ModeloUtilidadMatricial(P, modelo_base.U, modelo_base.w)
+
+    for indice, ue in modelo.top_k(k):
+        print(f"🔹 Plan #{indice}: Utilidad esperada = {ue:.2f}")
+
+    # Comprobamos con Monte Carlo las utilidades de las decisiones originales.
+    media, error = modelo_base.muestrear_utilidad(20000, semilla=semilla)
+    for decision, m, e in zip(modelo_base.nombres, media, error):
+        print(f"🎲 {decision}: {m:.2f} ± {1.96 * e:.2f} (exacta {utilidad_esperada(decision):.2f})")
+
 # 🎬 Ejecutamos el simulador de decisiones
 # Este bloque de código es el que inicia el proceso del simulador.
 if __name__ == "__main__":
     simular_decisiones()
+    simular_decisiones_masivas()
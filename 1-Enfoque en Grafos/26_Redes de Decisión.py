@@ -1,4 +1,5 @@
 import random  # Importamos el módulo random para posibles simulaciones aleatorias si fuera necesario
+import numpy as np  # NumPy para evaluar muchas apuestas a la vez con productos de matrices
 
 # Definir las probabilidades y resultados de un partido de fútbol
 # En el diccionario DECISIONES, las claves son las decisiones de apuestas posibles
@@ -92,6 +93,54 @@ def utilidad_esperada(decision):
     # Devolvemos la utilidad total calculada
     return utilidad_total
 
+# Versión vectorizada para tablas de apuestas grandes
+def utilidades_esperadas_matriz(probabilidades, utilidades):
+    """
+    Calcula la utilidad esperada de muchas apuestas a la vez.
+    probabilidades: matriz (apuestas × resultados) con la distribución de cada apuesta.
+    utilidades: matriz (apuestas × resultados) con la ganancia de cada apuesta en cada resultado,
+    o un vector (resultados) si todas comparten la misma tabla de pagos.
+    """
+    probabilidades = np.asarray(probabilidades, dtype=np.float64)
+    utilidades = np.asarray(utilidades, dtype=np.float64)
+    if utilidades.ndim == 1:
+        # Tabla de pagos compartida: un único producto matriz-vector
+        return probabilidades @ utilidades
+    # Tabla de pagos por apuesta: suma fila a fila sin construir matrices intermedias
+    return np.einsum("ij,ij->i", probabilidades, utilidades)
+
+def tabla_desde_decisiones(decisiones):
+    """
+    Convierte el diccionario DECISIONES en las matrices que usa utilidades_esperadas_matriz.
+    Devuelve (nombres de apuestas, nombres de resultados, probabilidades, utilidades).
+    Lanza ValueError si una apuesta repite un resultado (su utilidad sería ambigua).
+    """
+    resultados = sorted({evento["resultado"] for escenarios in decisiones.values() for evento in escenarios})
+    columna = {r: j for j, r in enumerate(resultados)}
+    probabilidades = np.zeros((len(decisiones), len(resultados)))
+    utilidades = np.zeros((len(decisiones), len(resultados)))
+    for i, decision in enumerate(decisiones):
+        vistos = set()
+        for evento in decisiones[decision]:
+            if evento["resultado"] in vistos:
+                raise ValueError(f"Resultado '{evento['resultado']}' repetido en la apuesta '{decision}'")
+            vistos.add(evento["resultado"])
+            probabilidades[i, columna[evento["resultado"]]] = evento["probabilidad"]
+            utilidades[i, columna[evento["resultado"]]] = evento["utilidad"]
+    return list(decisiones), resultados, probabilidades, utilidades
+
+def mejores_apuestas(probabilidades, utilidades, k):
+    """
+    Devuelve los índices y utilidades de las k mejores apuestas sin ordenar la tabla completa.
+    """
+    ue = utilidades_esperadas_matriz(probabilidades, utilidades)
+    k = max(0, min(k, len(ue)))
+    if k == 0:
+        return np.empty(0, dtype=np.intp), ue[:0]
+    candidatos = np.argpartition(ue, len(ue) - k)[-k:]
+    candidatos = candidatos[np.argsort(-ue[candidatos], kind="stable")]
+    return candidatos, ue[candidatos]
+
 # Función que simula las decisiones de apuestas y recomienda la mejor opción
 def simular_decisiones():
     """
@@ -123,3 +172,8 @@ def simular_decisiones():
 # Este bloque de código se ejecutará solo cuando el script sea corrido directamente (no cuando sea importado como módulo)
 if __name__ == "__main__":
     simular_decisiones()
+
+    # Comprobamos que la versión vectorizada recomienda la misma apuesta
+    nombres, _, P, U = tabla_desde_decisiones(DECISIONES)
+    indices, valores = mejores_apuestas(P, U, 1)
+    print(f"🧮 Vectorizado: {nombres[indices[0]]} (Utilidad esperada: {valores[0]:.2f})")
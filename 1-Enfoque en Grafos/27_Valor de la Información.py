@@ -1,3 +1,6 @@
+import string
+import numpy as np
+
 # Simulamos una decisión: ¿Invertir o no?
 # Dos estados posibles: Mercado BUENO o MALO
 
@@ -33,3 +36,223 @@ valor_informacion = UE_info_perfecta - UE_actual
 print("=== CON INFORMACIÓN PERFECTA ===")
 print(f"Utilidad esperada con información perfecta: {UE_info_perfecta}")
 print(f"Valor de la Información Perfecta (VOI): {valor_informacion}")
+
+
+
+# =====================================================================
+# Red de decisión general: nodos de azar, de decisión y de utilidad
+# ---------------------------------------------------------------------
+# En lugar de escribir cada fórmula a mano, la red se compila a tablas de
+# factores (arrays de NumPy con un eje por variable) y las consultas se
+# resuelven con einsum. Cada consulta solo usa los factores de los ancestros
+# de sus variables y de la evidencia, y los factores reducidos por la
+# evidencia y las rutas de einsum se guardan en caché: el VOI de muchos
+# sensores con la misma evidencia cuesta una consulta pequeña por sensor.
+# =====================================================================
+class RedDecision:
+    def __init__(self):
+        self.valores = {}      # variable -> lista de valores (azar) u opciones (decisión)
+        self.padres = {}       # nodo de azar -> lista de padres
+        self.cpts = {}         # nodo de azar -> array (padres..., variable)
+        self.decisiones = []   # nodos de decisión
+        self.utilidades = {}   # nodo de utilidad -> (padres, array)
+        self.compilada = False
+
+    def agregar_azar(self, nombre, valores, padres, cpt):
+        # cpt tiene un eje por padre (en orden) y el último eje para la propia variable
+        self.valores[nombre] = list(valores)
+        self.padres[nombre] = list(padres)
+        self.cpts[nombre] = np.asarray(cpt, dtype=np.float64)
+        self.compilada = False
+
+    def agregar_decision(self, nombre, opciones):
+        self.valores[nombre] = list(opciones)
+        self.decisiones.append(nombre)
+        self.compilada = False
+
+    def agregar_utilidad(self, nombre, padres, tabla):
+        # tabla tiene un eje por padre (azar o decisión)
+        self.utilidades[nombre] = (list(padres), np.asarray(tabla, dtype=np.float64))
+        self.compilada = False
+
+    def compilar(self):
+        # Valida las formas de las tablas y prepara los factores de cada nodo de azar
+        self.factores = {}
+        for nodo, cpt in self.cpts.items():
+            variables = self.padres[nodo] + [nodo]
+            forma = tuple(len(self.valores[v]) for v in variables)
+            if cpt.shape != forma:
+                raise ValueError(f"CPT de {nodo} con forma {cpt.shape}, se esperaba {forma}")
+            self.factores[nodo] = (cpt, variables)
+        for nodo, (padres, tabla) in self.utilidades.items():
+            forma = tuple(len(self.valores[v]) for v in padres)
+            if tabla.shape != forma:
+                raise ValueError(f"Utilidad {nodo} con forma {tabla.shape}, se esperaba {forma}")
+        # Padres de azar de todas las utilidades: lo único que hace falta para la UE
+        self.padres_utilidad = sorted({v for padres, _ in self.utilidades.values()
+                                       for v in padres if v not in self.decisiones})
+        self._cache_factores = {}
+        self._cache_utilidades = {}
+        self._cache_posterior = {}
+        self._cache_rutas = {}
+        self._cache_ancestros = {}
+        self.compilada = True
+        return self
+
+    def _clave_evidencia(self, evidencia):
+        return tuple(sorted((v, self.valores[v].index(x)) for v, x in evidencia.items()))
+
+    def _factores_con_evidencia(self, clave):
+        # Reduce cada factor fijando los ejes observados (se calcula una vez por evidencia)
+        if clave not in self._cache_factores:
+            fijos = dict(clave)
+            reducidos = {}
+            for nodo, (tabla, variables) in self.factores.items():
+                indice = tuple(fijos.get(v, slice(None)) for v in variables)
+                reducidos[nodo] = (tabla[indice], [v for v in variables if v not in fijos])
+            # Factor constante por decisión para que su eje exista aunque ninguna CPT dependa de ella
+            for d in self.decisiones:
+                reducidos[d] = (np.ones(len(self.valores[d])), [d])
+            self._cache_factores[clave] = reducidos
+        return self._cache_factores[clave]
+
+    def _utilidades_con_evidencia(self, clave):
+        # Tablas de utilidad con los padres observados ya fijados a su valor
+        if clave not in self._cache_utilidades:
+            fijos = dict(clave)
+            self._cache_utilidades[clave] = [
+                (tabla[tuple(fijos.get(v, slice(None)) for v in padres)], [v for v in padres if v not in fijos])
+                for padres, tabla in self.utilidades.values()]
+        return self._cache_utilidades[clave]
+
+    def _ancestros(self, variables):
+        # Las variables y todos sus ancestros: los demás nodos de azar suman 1 y sobran en la consulta
+        clave = frozenset(variables)
+        if clave not in self._cache_ancestros:
+            pendientes, vistos = list(clave), set()
+            while pendientes:
+                v = pendientes.pop()
+                if v not in vistos:
+                    vistos.add(v)
+                    pendientes.extend(self.padres.get(v, []))
+            self._cache_ancestros[clave] = vistos
+        return self._cache_ancestros[clave]
+
+    def _einsum(self, operandos, salida):
+        # Las letras se asignan por llamada (solo a las variables que aparecen), así que el límite
+        # de 52 letras de einsum es por consulta y no por red. Las rutas se optimizan una vez por
+        # consulta y se reutilizan.
+        nombres = list(dict.fromkeys(v for _, variables in operandos for v in variables))
+        if len(nombres) > len(string.ascii_letters):
+            raise ValueError("Demasiadas variables en una sola consulta para einsum")
+        eje = {v: string.ascii_letters[i] for i, v in enumerate(nombres)}
+        entrada = ",".join("".join(eje[v] for v in variables) for _, variables in operandos)
+        expresion = entrada + "->" + "".join(eje[v] for v in salida)
+        tablas = [tabla for tabla, _ in operandos]
+        clave = (tuple(tuple(variables) for _, variables in operandos), tuple(salida))
+        if clave not in self._cache_rutas:
+            self._cache_rutas[clave] = np.einsum_path(expresion, *tablas, optimize="greedy")[0]
+        return np.einsum(expresion, *tablas, optimize=self._cache_rutas[clave])
+
+    def posterior(self, variables, evidencia):
+        # P(variables | evidencia, decisiones) con un eje por variable y otro por cada decisión.
+        # Una variable observada conserva su eje, con toda la masa en el valor observado.
+        if not self.compilada:
+            self.compilar()
+        clave = (tuple(variables), self._clave_evidencia(evidencia))
+        if clave not in self._cache_posterior:
+            fijos = dict(clave[1])
+            libres = [v for v in variables if v not in fijos]
+            reducidos = self._factores_con_evidencia(clave[1])
+            relevantes = self._ancestros(list(variables) + list(fijos))
+            factores = [reducidos[n] for n in self.factores if n in relevantes]
+            factores += [reducidos[d] for d in self.decisiones]
+            conjunta = self._einsum(factores, libres + self.decisiones)
+            ejes_azar = tuple(range(len(libres)))
+            total = conjunta.sum(axis=ejes_azar, keepdims=True)
+            if np.any(total == 0):
+                raise ValueError(f"La evidencia {evidencia} tiene probabilidad cero")
+            conjunta = conjunta / total
+            for eje, v in enumerate(variables):
+                if v in fijos:
+                    indicador = np.zeros(len(self.valores[v]))
+                    indicador[fijos[v]] = 1.0
+                    conjunta = np.multiply.outer(indicador, conjunta)
+                    conjunta = np.moveaxis(conjunta, 0, eje)
+            self._cache_posterior[clave] = conjunta
+        return self._cache_posterior[clave]
+
+    def _utilidad_por_decision(self, variables_extra, evidencia):
+        # Suma de las utilidades esperadas, con un eje por cada variable extra (no observada) y por
+        # decisión. Los padres observados se fijan en las tablas de utilidad en vez de pedirse como ejes.
+        if not self.compilada:
+            self.compilar()
+        clave = self._clave_evidencia(evidencia)
+        fijos = dict(clave)
+        variables = list(variables_extra) + [v for v in self.padres_utilidad
+                                             if v not in variables_extra and v not in fijos]
+        conjunta = (self.posterior(variables, evidencia), variables + self.decisiones)
+        salida = list(variables_extra) + self.decisiones
+        return sum(self._einsum([conjunta, (tabla, padres)], salida)
+                   for tabla, padres in self._utilidades_con_evidencia(clave))
+
+    def utilidad_esperada(self, evidencia=None):
+        # UE de cada combinación de decisiones dada la evidencia
+        return self._utilidad_por_decision([], evidencia or {})
+
+    def mejor_decision(self, evidencia=None):
+        ue = self.utilidad_esperada(evidencia)
+        indice = np.unravel_index(np.argmax(ue), ue.shape)
+        return {d: self.valores[d][i] for d, i in zip(self.decisiones, indice)}, float(ue[indice])
+
+    def valor_informacion(self, sensor, evidencia=None):
+        return self.valor_informacion_todos([sensor], evidencia)[sensor]
+
+    def valor_informacion_todos(self, sensores, evidencia=None):
+        # VOI(S) = Σ_s P(s) max_d UE(d | s, e) - max_d UE(d | e), para todos los sensores.
+        # Cada sensor calcula su propia P(sensor, padres de utilidad | e) sobre los factores ya
+        # reducidos por la evidencia (en caché), así que el coste es lineal en el número de sensores.
+        evidencia = evidencia or {}
+        ue_actual = self.utilidad_esperada(evidencia).max()
+        resultado = {}
+        for sensor in sensores:
+            if sensor in evidencia:
+                resultado[sensor] = 0.0
+                continue
+            # Con el sensor en la conjunta, Σ_x P(x, s | e) U(x, d) ya viene ponderado por P(s)
+            ue = self._utilidad_por_decision([sensor], evidencia)
+            ue = ue.reshape(ue.shape[0], -1)
+            resultado[sensor] = max(float(ue.max(axis=1).sum() - ue_actual), 0.0)
+        return resultado
+
+
+if __name__ == "__main__":
+    # El mismo problema de inversión, ahora como red de decisión con varios sensores
+    red = RedDecision()
+    red.agregar_azar("Mercado", ["bueno", "malo"], [], [prob_bueno, prob_malo])
+    red.agregar_azar("Informe", ["positivo", "negativo"], ["Mercado"], [[0.8, 0.2], [0.3, 0.7]])
+    red.agregar_azar("Encuesta", ["positiva", "negativa"], ["Mercado"], [[0.6, 0.4], [0.45, 0.55]])
+    red.agregar_azar("Oraculo", ["bueno", "malo"], ["Mercado"], [[1.0, 0.0], [0.0, 1.0]])
+    red.agregar_decision("Accion", ["Invertir", "No invertir"])
+    red.agregar_utilidad("Ganancia", ["Mercado", "Accion"],
+                         [[utilidad_invertir_bueno, utilidad_no_invertir],
+                          [utilidad_invertir_malo, utilidad_no_invertir]])
+    red.compilar()
+
+    print("\n=== RED DE DECISIÓN ===")
+    decision, ue = red.mejor_decision()
+    print(f"Mejor decisión: {decision['Accion']} (UE = {ue})")
+    for sensor, voi in red.valor_informacion_todos(["Informe", "Encuesta", "Oraculo"]).items():
+        print(f"VOI de {sensor}: {voi:.2f}")
+
+    # Evidencia sobre un padre de la utilidad: con el mercado conocido no queda nada que aprender
+    decision, ue = red.mejor_decision({"Mercado": "malo"})
+    print(f"Sabiendo que el mercado es malo: {decision['Accion']} (UE = {ue})")
+    assert decision["Accion"] == "No invertir" and ue == utilidad_no_invertir
+    voi = red.valor_informacion_todos(["Informe", "Encuesta"], {"Mercado": "malo"})
+    assert all(abs(v) < 1e-12 for v in voi.values())
+    # Evaluar todos los sensores a la vez da lo mismo que uno por uno
+    conjunto = red.valor_informacion_todos(["Informe", "Encuesta", "Oraculo"], {"Encuesta": "positiva"})
+    for sensor, voi in conjunto.items():
+        assert np.isclose(voi, red.valor_informacion(sensor, {"Encuesta": "positiva"}))
+    print("VOI con una encuesta positiva:", {s: round(v, 2) for s, v in conjunto.items()})
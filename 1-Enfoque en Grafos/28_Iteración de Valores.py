@@ -1,3 +1,4 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -92,3 +93,206 @@ def display():
     plt.show()
 
 display()
+
+
+# ============================================================
+# Motor de iteración de valores con transiciones dispersas
+# ============================================================
+# La versión anterior recorre celda por celda y acción por acción en Python y
+# depende de las variables globales. Aquí el MDP se compila en un tensor
+# disperso (S×A×S) guardado en formato CSR: la fila s*A + a contiene los
+# destinos y probabilidades de ejecutar la acción a en el estado s. Cada
+# backup de Bellman es una operación vectorizada sobre bloques de estados, y
+# el tamaño del bloque se ajusta al presupuesto de memoria.
+
+def _ranges(starts, ends):
+    # Concatena los rangos [starts[k], ends[k]) sin bucles de Python
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(ends - lengths.cumsum(), lengths)
+    return np.arange(total, dtype=np.int64) + offsets
+
+
+class SparseMDP:
+    def __init__(self, n_states, n_actions, indptr, indices, probs, rewards, dtype=np.float32):
+        # indptr tiene S*A + 1 entradas; indices/probs son los destinos y probabilidades.
+        # rewards es (S, A): recompensa esperada de ejecutar a en s.
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        index_type = np.int32 if n_states < 2**31 else np.int64
+        self.indices = np.asarray(indices, dtype=index_type)
+        self.probs = np.asarray(probs, dtype=dtype)
+        self.rewards = np.asarray(rewards, dtype=dtype).reshape(n_states, n_actions)
+        self.dtype = dtype
+        if len(self.indptr) != n_states * n_actions + 1:
+            raise ValueError("indptr debe tener S*A + 1 entradas")
+        self._pred_indptr = None
+        self._pred_states = None
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.probs.nbytes + self.rewards.nbytes
+
+    def _bytes_per_state(self):
+        # Temporales de un backup por estado: Q (A valores) y los productos por entrada
+        entries_per_state = len(self.probs) / max(self.n_states, 1)
+        return self.n_actions * 8 + int(np.ceil(entries_per_state)) * 24
+
+    def block_size(self, memory_budget=None):
+        if memory_budget is None:
+            return min(self.n_states, 65536)
+        return int(max(1, min(self.n_states, memory_budget // self._bytes_per_state())))
+
+    def q_values(self, V, gamma, states=None):
+        # Q(s, ·) para un conjunto de estados (todos por defecto); states puede ser un slice contiguo o un array
+        A = self.n_actions
+        if states is None:
+            states = slice(0, self.n_states)
+        if isinstance(states, slice):
+            lo, hi = states.start, states.stop
+            rows_lo, rows_hi = lo * A, hi * A
+            entries = slice(self.indptr[rows_lo], self.indptr[rows_hi])
+            counts = np.diff(self.indptr[rows_lo:rows_hi + 1])
+            rewards = self.rewards[lo:hi]
+            n = hi - lo
+        else:
+            rows = (states[:, None] * A + np.arange(A)).ravel()
+            entries = _ranges(self.indptr[rows], self.indptr[rows + 1])
+            counts = self.indptr[rows + 1] - self.indptr[rows]
+            rewards = self.rewards[states]
+            n = len(states)
+        local_rows = np.repeat(np.arange(n * A), counts)
+        expected = np.bincount(local_rows, weights=self.probs[entries] * V[self.indices[entries]],
+                               minlength=n * A)
+        return rewards + gamma * expected.reshape(n, A)
+
+    def predecessors(self, states):
+        # Estados que pueden llegar a `states` en un paso (índice transpuesto, construido una vez)
+        if self._pred_indptr is None:
+            sources = np.repeat(np.arange(self.n_states * self.n_actions) // self.n_actions,
+                                np.diff(self.indptr))
+            order = np.argsort(self.indices, kind="stable")
+            self._pred_states = sources[order].astype(self.indices.dtype)
+            self._pred_indptr = np.concatenate(
+                [[0], np.cumsum(np.bincount(self.indices, minlength=self.n_states))])
+        entries = _ranges(self._pred_indptr[states], self._pred_indptr[states + 1])
+        return np.unique(self._pred_states[entries])
+
+    def value_iteration(self, gamma=0.9, tol=0.001, mode="jacobi",
+                        memory_budget=None, max_iterations=10000, batch_size=None):
+        """
+        mode:
+          - "jacobi": cada barrido usa solo los valores del barrido anterior
+          - "gauss-seidel": los bloques ya actualizados se usan en el mismo barrido
+          - "prioritized": actualiza primero los estados con mayor residuo de Bellman
+        Devuelve (V, stats); la política se obtiene con extract_policy(V, gamma).
+        """
+        start = time.perf_counter()
+        V = np.zeros(self.n_states, dtype=np.float64)
+        block = self.block_size(memory_budget)
+        blocks = [slice(lo, min(lo + block, self.n_states)) for lo in range(0, self.n_states, block)]
+        backups = 0
+        iteration = 0
+
+        if mode in ("jacobi", "gauss-seidel"):
+            new_V = np.empty_like(V) if mode == "jacobi" else V
+            while iteration < max_iterations:
+                delta = 0.0
+                for b in blocks:
+                    best = self.q_values(V, gamma, b).max(axis=1)
+                    delta = max(delta, float(np.abs(best - V[b]).max()))
+                    new_V[b] = best
+                backups += self.n_states
+                if mode == "jacobi":
+                    V, new_V = new_V, V
+                iteration += 1
+                if delta < tol:
+                    break
+        elif mode == "prioritized":
+            batch = batch_size or max(1, min(block, self.n_states // 10 or 1))
+            residual = np.empty(self.n_states)
+            for b in blocks:
+                residual[b] = np.abs(self.q_values(V, gamma, b).max(axis=1) - V[b])
+            backups += self.n_states
+            while iteration < max_iterations:
+                k = min(batch, self.n_states)
+                chosen = np.argpartition(residual, self.n_states - k)[-k:]
+                if residual[chosen].max() < tol:
+                    break
+                chosen = chosen[residual[chosen] >= tol]
+                V[chosen] = self.q_values(V, gamma, chosen).max(axis=1)
+                residual[chosen] = 0.0
+                # Solo cambian los residuos de quienes dependen de los estados actualizados
+                affected = self.predecessors(chosen)
+                for lo in range(0, len(affected), block):
+                    part = affected[lo:lo + block]
+                    residual[part] = np.abs(self.q_values(V, gamma, part).max(axis=1) - V[part])
+                backups += len(chosen) + len(affected)
+                iteration += 1
+        else:
+            raise ValueError(f"Modo desconocido: {mode}")
+
+        stats = {"mode": mode, "iterations": iteration, "backups": backups,
+                 "block_size": block, "model_bytes": self.nbytes,
+                 "time": time.perf_counter() - start}
+        return V, stats
+
+    def extract_policy(self, V, gamma=0.9, memory_budget=None):
+        # Acción voraz respecto a V (índices de acción), calculada por bloques
+        block = self.block_size(memory_budget)
+        policy = np.empty(self.n_states, dtype=np.int8 if self.n_actions < 128 else np.int32)
+        for lo in range(0, self.n_states, block):
+            b = slice(lo, min(lo + block, self.n_states))
+            policy[b] = self.q_values(V, gamma, b).argmax(axis=1)
+        return policy
+
+
+def compile_grid(grid, rewards, moves, blocked="#", terminals=("G", "T"), dtype=np.float32):
+    # Compila un mapa de celdas en un SparseMDP sin recorrer las celdas en Python.
+    # Moverse contra una pared o el borde deja al agente en su sitio (como one_step).
+    # Las celdas terminales y bloqueadas son absorbentes con recompensa 0.
+    tiles = np.asarray(grid)
+    n_rows, n_cols = tiles.shape
+    S, A = n_rows * n_cols, len(moves)
+    ii, jj = np.divmod(np.arange(S), n_cols)
+    flat = tiles.ravel()
+    tile_reward = np.zeros(S, dtype=dtype)
+    for tile, r in rewards.items():
+        tile_reward[flat == tile] = r
+    absorbing = (flat == blocked) | np.isin(flat, list(terminals))
+
+    dest = np.empty((S, A), dtype=np.int64)
+    for a, (di, dj) in enumerate(moves):
+        ni, nj = ii + di, jj + dj
+        inside = (ni >= 0) & (ni < n_rows) & (nj >= 0) & (nj < n_cols)
+        target = np.where(inside, ni * n_cols + nj, 0)
+        valid = inside & (flat[target] != blocked)
+        dest[:, a] = np.where(valid & ~absorbing, target, np.arange(S))
+    reward = np.where(absorbing[:, None], 0, tile_reward[dest]).astype(dtype)
+    return SparseMDP(S, A, np.arange(S * A + 1), dest.ravel(), np.ones(S * A, dtype=dtype),
+                     reward, dtype=dtype)
+
+
+if __name__ == "__main__":
+    moves = list(directions.values())
+    arrows = np.array(list(directions.keys()))
+    mdp = compile_grid(dungeon_map, reward_dict, moves)
+    for mode in ("jacobi", "gauss-seidel", "prioritized"):
+        V_fast, stats = mdp.value_iteration(gamma, threshold, mode=mode)
+        error = np.abs(V_fast.reshape(rows, cols) - V).max()
+        print(f"{mode:>13}: {stats['iterations']} iteraciones, {stats['backups']} backups, "
+              f"error máximo frente a value_iteration() = {error:.4f}")
+    print(arrows[mdp.extract_policy(V_fast, gamma)].reshape(rows, cols))
+
+    # Mazmorra grande: un millón de estados con un presupuesto de 64 MB para temporales
+    rng = np.random.default_rng(0)
+    big = rng.choice(['S', '#', 'T'], size=(1000, 1000), p=[0.9, 0.08, 0.02])
+    big[0, -1] = 'G'
+    big_mdp = compile_grid(big, reward_dict, moves)
+    _, stats = big_mdp.value_iteration(gamma, threshold, mode="gauss-seidel",
+                                          memory_budget=64 * 2**20)
+    print(f"1.000.000 estados: {stats['iterations']} barridos en {stats['time']:.1f} s "
+          f"(modelo {stats['model_bytes'] / 2**20:.0f} MB, bloques de {stats['block_size']} estados)")
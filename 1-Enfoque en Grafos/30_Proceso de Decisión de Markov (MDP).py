@@ -1,3 +1,5 @@
+import json
+import time
 import numpy as np
 import random
 
@@ -99,3 +101,161 @@ def print_policy(policy):
 value_iteration()
 final_policy = extract_policy()
 print_policy(final_policy)
+
+
+
+# ============================================================
+# MDP genérico con transiciones dispersas (CSR)
+# ============================================================
+# Compila cualquier cuadrícula o grafo en índices enteros de estado/acción.
+# La fila s*A + a de la matriz CSR guarda los destinos y probabilidades de
+# ejecutar la acción a en el estado s; rewards[s, a] es la recompensa esperada.
+# Así la iteración de valores y la extracción de la política son operaciones
+# sobre arrays, y el modelo compilado se guarda en un .npz para no
+# reconstruirlo en cada proceso.
+
+class MDP:
+    def __init__(self, n_states, n_actions, indptr, indices, probs, rewards,
+                 state_labels=None, action_labels=None):
+        # Las etiquetas son opcionales (por defecto los índices 0..S-1 y 0..A-1) y se guardan
+        # como listas de Python: así una tupla (i, j) o ('a', 1) sigue siendo una tupla
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.state_labels = list(range(n_states)) if state_labels is None else list(state_labels)
+        self.action_labels = list(range(n_actions)) if action_labels is None else list(action_labels)
+        if len(self.state_labels) != n_states or len(self.action_labels) != n_actions:
+            raise ValueError("Debe haber una etiqueta por estado y por acción")
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32 if self.n_states < 2**31 else np.int64)
+        self.probs = np.asarray(probs, dtype=np.float64)
+        self.rewards = np.asarray(rewards, dtype=np.float64).reshape(self.n_states, self.n_actions)
+        if len(self.indptr) != self.n_states * self.n_actions + 1:
+            raise ValueError("indptr debe tener S*A + 1 entradas")
+        self._rows = np.repeat(np.arange(self.n_states * self.n_actions), np.diff(self.indptr))
+
+    @classmethod
+    def from_graph(cls, states, actions, transitions):
+        # transitions(s, a) devuelve una lista de (s_siguiente, probabilidad, recompensa)
+        index = {s: k for k, s in enumerate(states)}
+        indptr, indices, probs = [0], [], []
+        rewards = np.zeros((len(states), len(actions)))
+        for k, s in enumerate(states):
+            for a_k, a in enumerate(actions):
+                for s_next, p, r in transitions(s, a):
+                    indices.append(index[s_next])
+                    probs.append(p)
+                    rewards[k, a_k] += p * r
+                indptr.append(len(indices))
+        return cls(len(states), len(actions), indptr, indices, probs, rewards, list(states), list(actions))
+
+    @classmethod
+    def from_grid(cls, grid, rewards, moves, slips, blocked=()):
+        # Versión vectorizada para cuadrículas: moves[a] = (di, dj) y slips[a] = [(dir, prob), ...].
+        # Chocar con el borde o con una celda bloqueada deja al agente en su sitio.
+        tiles = np.asarray(grid)
+        n_rows, n_cols = tiles.shape
+        flat = tiles.ravel()
+        open_cells = np.flatnonzero(~np.isin(flat, list(blocked)))
+        state_of_cell = np.full(flat.size, -1, dtype=np.int64)
+        state_of_cell[open_cells] = np.arange(len(open_cells))
+        ii, jj = np.divmod(open_cells, n_cols)
+        tile_reward = np.array([rewards[t] for t in flat[open_cells]], dtype=np.float64)
+
+        actions = list(slips)
+        dest = {}
+        for d, (di, dj) in moves.items():
+            ni, nj = ii + di, jj + dj
+            inside = (ni >= 0) & (ni < n_rows) & (nj >= 0) & (nj < n_cols)
+            target = state_of_cell[np.where(inside, ni * n_cols + nj, 0)]
+            dest[d] = np.where(inside & (target >= 0), target, np.arange(len(open_cells)))
+
+        width = max(len(outcomes) for outcomes in slips.values())
+        S, A = len(open_cells), len(actions)
+        indices = np.zeros((S, A, width), dtype=np.int64)
+        probs = np.zeros((S, A, width))
+        for a_k, a in enumerate(actions):
+            for w, (d, p) in enumerate(slips[a]):
+                indices[:, a_k, w] = dest[d]
+                probs[:, a_k, w] = p
+        expected = (probs * tile_reward[indices]).sum(axis=2)
+        labels = list(zip(ii.tolist(), jj.tolist()))
+        return cls(S, A, np.arange(S * A + 1) * width, indices.ravel(), probs.ravel(), expected,
+                   labels, actions)
+
+    def q_values(self, V, gamma):
+        expected = np.bincount(self._rows, weights=self.probs * V[self.indices],
+                               minlength=self.n_states * self.n_actions)
+        return self.rewards + gamma * expected.reshape(self.n_states, self.n_actions)
+
+    def value_iteration(self, gamma=0.9, tol=0.01, max_iterations=100000):
+        # Devuelve (V, stats); la política se obtiene con extract_policy(V, gamma)
+        start = time.perf_counter()
+        V = np.zeros(self.n_states)
+        iteration = 0
+        while iteration < max_iterations:
+            new_V = self.q_values(V, gamma).max(axis=1)
+            delta = np.abs(new_V - V).max()
+            V = new_V
+            iteration += 1
+            if delta < tol:
+                break
+        return V, {"iterations": iteration, "time": time.perf_counter() - start}
+
+    def extract_policy(self, V, gamma=0.9):
+        return self.q_values(V, gamma).argmax(axis=1)
+
+    def save(self, path):
+        # Formato binario compacto (.npz sin pickle). Las etiquetas viajan como texto JSON,
+        # así que deben ser números, textos o tuplas/listas de ellos
+        labels = json.dumps({"states": self.state_labels, "actions": self.action_labels},
+                            ensure_ascii=False)
+        np.savez(path, labels=np.array(labels), indptr=self.indptr, indices=self.indices,
+                 probs=self.probs, rewards=self.rewards)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            labels = json.loads(str(data["labels"]))
+            states, actions = _as_tuples(labels["states"]), _as_tuples(labels["actions"])
+            return cls(len(states), len(actions), data["indptr"], data["indices"],
+                       data["probs"], data["rewards"], states, actions)
+
+
+def _as_tuples(values):
+    # JSON no distingue tuplas de listas: al cargar, toda lista anidada vuelve a ser tupla
+    return [tuple(_as_tuples(v)) if isinstance(v, list) else v for v in values]
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    mdp = MDP.from_grid(island, reward_map, move_delta, transition_probs, blocked=['🕳️'])
+    V_fast, _ = mdp.value_iteration(gamma, theta)
+    pi_fast = mdp.extract_policy(V_fast, gamma)
+    cells = tuple(np.array(mdp.state_labels).T)
+    print(f"\n⚙️ MDP compilado: {mdp.n_states} estados, {len(mdp.probs)} transiciones")
+    print(f"Diferencia máxima con value_iteration(): {np.abs(V_fast - V[cells]).max():.4f}")
+
+    path = os.path.join(tempfile.mkdtemp(), "isla.npz")
+    mdp.save(path)
+    loaded = MDP.load(path)
+    same = np.array_equal(loaded.extract_policy(loaded.value_iteration(gamma, theta)[0], gamma), pi_fast)
+    same_labels = loaded.state_labels == mdp.state_labels and loaded.action_labels == mdp.action_labels
+    print(f"💾 Guardado en {os.path.getsize(path)} bytes; política idéntica al recargar: {same}, "
+          f"etiquetas idénticas: {same_labels}")
+
+    # Ida y vuelta con estados etiquetados como tuplas mixtas ('isla', i, j) construidos desde el grafo
+    def transitions(s, a):
+        _, i, j = s
+        outcomes = []
+        for d, p in transition_probs[a]:
+            ni, nj = move(i, j, d)
+            outcomes.append((('isla', ni, nj), p, reward_map[island[ni][nj]]))
+        return outcomes
+    graph_mdp = MDP.from_graph([('isla',) + s for s in states], actions, transitions)
+    path = os.path.join(tempfile.mkdtemp(), "grafo.npz")
+    graph_mdp.save(path)
+    loaded = MDP.load(path)
+    print("🔁 Estados-tupla tras recargar:", loaded.state_labels[:3],
+          "idénticos:", loaded.state_labels == graph_mdp.state_labels,
+          "| mismo V que la cuadrícula:", np.allclose(loaded.value_iteration(gamma, theta)[0], V_fast))
@@ -1,4 +1,5 @@
 import random
+import numpy as np
 
 # --- Definición del mundo ---
 states = ['Bosque', 'Playa', 'Montaña', 'Cueva', 'Tesoro']
@@ -80,3 +81,139 @@ for step in range(10):
     if current_state == 'Tesoro':
         print("🏆 ¡Tesoro encontrado!")
         break
+
+
+# --- Solver PBVI / Perseus con alfa-vectores en NumPy ---
+# Las reglas de choose_action son fijas; aquí calculamos una política real
+# fuera de línea. El POMDP se guarda como arrays:
+#   T[a, s, s'] transición, Z[s', o] observación, R[s, a] recompensa
+# y la función de valor es el máximo de un conjunto de alfa-vectores (K × S),
+# cada uno con su acción. Evaluar una creencia es un producto matriz-vector.
+class POMDPSolver:
+    def __init__(self, T, Z, R, gamma=0.95):
+        self.T = np.asarray(T, dtype=np.float64)
+        self.Z = np.asarray(Z, dtype=np.float64)
+        self.R = np.asarray(R, dtype=np.float64)
+        self.gamma = gamma
+        self.n_actions, self.n_states, _ = self.T.shape
+        self.n_obs = self.Z.shape[1]
+        # Cota inferior inicial: recibir siempre la peor recompensa
+        self.alphas = np.full((1, self.n_states), self.R.min() / (1 - gamma))
+        self.alpha_actions = np.zeros(1, dtype=np.int64)
+
+    def update_beliefs(self, B, a, o):
+        # Actualiza un lote de creencias (N × S) dadas acciones y observaciones por fila
+        predicted = np.einsum("ns,nsp->np", B, self.T[a])
+        new_B = predicted * self.Z[:, o].T
+        total = new_B.sum(axis=1, keepdims=True)
+        return np.divide(new_B, total, out=np.zeros_like(new_B), where=total > 0)
+
+    def sample_beliefs(self, n_beliefs, horizon=20, seed=None):
+        # Explora con acciones aleatorias y guarda las creencias alcanzadas
+        rng = np.random.default_rng(seed)
+        per_step = max(1, n_beliefs // horizon)
+        B = np.full((per_step, self.n_states), 1.0 / self.n_states)
+        s = rng.integers(self.n_states, size=per_step)
+        collected = [B]
+        for _ in range(horizon - 1):
+            a = rng.integers(self.n_actions, size=per_step)
+            cdf = self.T[a, s].cumsum(axis=1)
+            s = np.minimum((cdf < rng.random((per_step, 1))).sum(axis=1), self.n_states - 1)
+            cdf = self.Z[s].cumsum(axis=1)
+            o = np.minimum((cdf < rng.random((per_step, 1))).sum(axis=1), self.n_obs - 1)
+            B = self.update_beliefs(B, a, o)
+            collected.append(B)
+        B = np.concatenate(collected)
+        return np.unique(np.round(B, 6), axis=0)
+
+    def _backup(self, B):
+        # Backup de Bellman puntual para todas las creencias de B a la vez.
+        # G[a, o, k, s] = γ Σ_s' T[a, s, s'] Z[s', o] α_k(s')
+        G = self.gamma * np.einsum("asp,po,kp->aoks", self.T, self.Z, self.alphas)
+        scores = np.einsum("ns,aoks->naok", B, G)
+        best = scores.argmax(axis=3)                              # (N, A, O)
+        a_idx = np.arange(self.n_actions)[None, :, None]
+        o_idx = np.arange(self.n_obs)[None, None, :]
+        candidates = self.R.T[None] + G[a_idx, o_idx, best].sum(axis=2)   # (N, A, S)
+        values = np.einsum("ns,nas->na", B, candidates)
+        chosen = values.argmax(axis=1)
+        return candidates[np.arange(len(B)), chosen], chosen
+
+    def solve(self, B, mode="perseus", iterations=100, tol=1e-4, batch_size=32, seed=None):
+        """
+        mode:
+          - "pbvi": en cada iteración se hace backup de todas las creencias
+          - "perseus": backups aleatorios por lotes solo de las creencias que aún no mejoraron
+        """
+        rng = np.random.default_rng(seed)
+        for _ in range(iterations):
+            old_values = self.values(B)
+            if mode == "pbvi":
+                new_alphas, new_actions = self._backup(B)
+            elif mode == "perseus":
+                pending = np.ones(len(B), dtype=bool)
+                new_alphas = np.empty((0, self.n_states))
+                new_actions = np.empty(0, dtype=np.int64)
+                while pending.any():
+                    idx = np.flatnonzero(pending)
+                    pick = rng.choice(idx, size=min(batch_size, len(idx)), replace=False)
+                    alphas, acts = self._backup(B[pick])
+                    # Si el backup no mejora su creencia, se conserva el mejor alfa anterior
+                    improved = np.einsum("ns,ns->n", B[pick], alphas) >= old_values[pick]
+                    old_best = (B[pick] @ self.alphas.T).argmax(axis=1)
+                    alphas = np.where(improved[:, None], alphas, self.alphas[old_best])
+                    acts = np.where(improved, acts, self.alpha_actions[old_best])
+                    new_alphas = np.vstack([new_alphas, alphas])
+                    new_actions = np.concatenate([new_actions, acts])
+                    covered = (B[idx] @ new_alphas.T).max(axis=1) >= old_values[idx]
+                    pending[idx[covered]] = False
+                    pending[pick] = False
+            else:
+                raise ValueError(f"Modo desconocido: {mode}")
+            self.alphas, keep = np.unique(np.round(new_alphas, 10), axis=0, return_index=True)
+            self.alpha_actions = new_actions[keep]
+            if np.abs(self.values(B) - old_values).max() < tol:
+                break
+        return self
+
+    def values(self, B):
+        return (np.atleast_2d(B) @ self.alphas.T).max(axis=1)
+
+    def policy(self, B):
+        # Consulta en tiempo de ejecución: un producto matriz-vector contra todos los alfa-vectores
+        return self.alpha_actions[(np.atleast_2d(B) @ self.alphas.T).argmax(axis=1)]
+
+
+def build_model():
+    # Traduce las funciones y diccionarios del mundo a arrays para el solver
+    S, A, O = len(states), len(actions), len(observations)
+    T = np.zeros((A, S, S))
+    for s_k, s in enumerate(states):
+        for a_k, a in enumerate(actions):
+            T[a_k, s_k, states.index(transition(s, a))] = 1.0
+    # Mismo criterio que update_belief: 0.9 para observaciones típicas, 0.1 para el resto
+    Z = np.array([[0.9 if o in observation_model[s] else 0.1 for o in observations] for s in states])
+    Z /= Z.sum(axis=1, keepdims=True)
+    r = np.array([reward(s) for s in states], dtype=np.float64)
+    R = np.einsum("asp,p->sa", T, r)
+    return T, Z, R
+
+
+if __name__ == "__main__":
+    solver = POMDPSolver(*build_model(), gamma=0.95)
+    B = solver.sample_beliefs(500, seed=0)
+    solver.solve(B, mode="perseus", seed=0)
+    print(f"\n🧮 Perseus: {len(solver.alphas)} alfa-vectores sobre {len(B)} creencias")
+
+    b = np.full(len(states), 1.0 / len(states))
+    current_state = random.choice(states)
+    print(f"🌍 Estado inicial oculto: {current_state}")
+    for step in range(10):
+        a = int(solver.policy(b)[0])
+        current_state = transition(current_state, actions[a])
+        o = random.choices(range(len(observations)), weights=solver.Z[states.index(current_state)])[0]
+        b = solver.update_beliefs(b[None], np.array([a]), np.array([o]))[0]
+        print(f"➡️ {actions[a]} → 👀 {observations[o]} (P(Tesoro) = {b[states.index('Tesoro')]:.2f})")
+        if current_state == 'Tesoro':
+            print("🏆 ¡Tesoro encontrado con la política PBVI!")
+            break
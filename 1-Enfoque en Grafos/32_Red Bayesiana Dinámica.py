@@ -1,4 +1,6 @@
 import random
+import time
+import numpy as np
 
 # --- Variables posibles ---
 states = ['Intruso', 'NoIntruso']
@@ -32,7 +34,7 @@ def sample_from_distribution(prob_dist):
     return key  # fallback
 
 # Simulación del sistema durante T pasos de tiempo
-def simulate_dynamics(T=10):
+def simulate_dynamics(T=10, verbose=True):
     intruso_history = []
     alarma_history = []
 
@@ -47,12 +49,71 @@ def simulate_dynamics(T=10):
         intruso_history.append(state)
         alarma_history.append(observacion)
 
-        print(f"⏱️ t={t} | Estado: {state} | Alarma: {observacion}")
+        if verbose:
+            print(f"⏱️ t={t} | Estado: {state} | Alarma: {observacion}")
 
         # Transicionar al siguiente estado
         state = sample_from_distribution(P_transition[state])
 
     return intruso_history, alarma_history
 
-# Ejecutar simulación
-simulate_dynamics(T=15)
+# --- Muestreo vectorizado de muchas trayectorias ---
+# Las distribuciones se convierten en tablas acumuladas (una fila por estado
+# padre) y se avanza un paso de tiempo para N trayectorias a la vez: cada
+# muestra es una comparación del número aleatorio con la fila de su padre.
+def cumulative_table(dist, parents, values):
+    table = np.array([[dist[p][v] for v in values] for p in parents]).cumsum(axis=1)
+    table[:, -1] = 1.0  # Evita que el redondeo deje muestras fuera de la tabla
+    return table
+
+def sample_rows(table, parent_idx, rng):
+    # Una muestra por trayectoria a partir de la fila de su padre
+    u = rng.random(len(parent_idx))
+    return (table[parent_idx] <= u[:, None]).sum(axis=1).astype(np.uint8)
+
+def simulate_dynamics_batch(n, T=10, seed=None, out_path=None, block_size=1_000_000, verbose=False):
+    """
+    Simula n trayectorias de T pasos. Devuelve dos arrays (T, n) de uint8 con
+    los índices en `states` y `alarms`. Con out_path se escriben en ficheros
+    .npy mapeados en memoria (out_path + '_intruso.npy' y '_alarma.npy').
+    """
+    rng = np.random.default_rng(seed)
+    initial = cumulative_table({None: P_Intruso_0}, [None], states)
+    transition = cumulative_table(P_transition, states, states)
+    observation = cumulative_table(P_observation, states, alarms)
+
+    if out_path is None:
+        intruso = np.empty((T, n), dtype=np.uint8)
+        alarma = np.empty((T, n), dtype=np.uint8)
+    else:
+        intruso = np.lib.format.open_memmap(f"{out_path}_intruso.npy", mode="w+", dtype=np.uint8, shape=(T, n))
+        alarma = np.lib.format.open_memmap(f"{out_path}_alarma.npy", mode="w+", dtype=np.uint8, shape=(T, n))
+
+    # Por bloques de trayectorias para acotar la memoria de los temporales
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        state = sample_rows(initial, np.zeros(hi - lo, dtype=np.uint8), rng)
+        for t in range(T):
+            intruso[t, lo:hi] = state
+            alarma[t, lo:hi] = sample_rows(observation, state, rng)
+            if verbose and lo == 0:
+                print(f"⏱️ t={t} | Estado: {states[state[0]]} | Alarma: {alarms[alarma[t, 0]]}")
+            state = sample_rows(transition, state, rng)
+
+    if out_path is not None:
+        intruso.flush()
+        alarma.flush()
+    return intruso, alarma
+
+if __name__ == "__main__":
+    # Ejecutar simulación
+    simulate_dynamics(T=15)
+
+    n, T = 1_000_000, 15
+    start = time.perf_counter()
+    intruso, alarma = simulate_dynamics_batch(n, T, seed=0)
+    elapsed = time.perf_counter() - start
+    # Riesgo: trayectorias con algún intruso que no disparó la alarma
+    missed = ((intruso == states.index('Intruso')) & (alarma == alarms.index('NoAlarma'))).any(axis=0)
+    print(f"\n🚨 {n} trayectorias × {T} pasos en {elapsed:.2f} s ({n * T / elapsed:,.0f} pasos/s)")
+    print(f"📊 P(algún intruso sin alarma) ≈ {missed.mean():.4f}")
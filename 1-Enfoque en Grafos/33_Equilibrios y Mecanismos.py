@@ -1,4 +1,9 @@
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
 
 # Configuración del dilema
 RECOMPENSAS = {
@@ -64,4 +69,177 @@ def simular_generaciones(generaciones=10, n=10):
         top = scores_sorted[:len(poblacion)//2]
         poblacion = [Jugador(j.estrategia_func) for j in top for _ in range(2)]
 
+# --- Caché de pagos entre estrategias ---
+# Entre dos estrategias deterministas, una partida de k rondas (con historias
+# nuevas) siempre da el mismo resultado: se juega una sola vez por par.
+def jugar_partida(estrategia_a, estrategia_b, rondas):
+    historia_a, historia_b = [], []
+    score_a = score_b = 0
+    for _ in range(rondas):
+        a = estrategia_a(historia_a)
+        b = estrategia_b(historia_b)
+        s1, s2 = RECOMPENSAS[(a, b)]
+        historia_a.append((a, b))
+        historia_b.append((b, a))
+        score_a += s1
+        score_b += s2
+    return score_a, score_b
+
+def es_estocastica(estrategia):
+    return getattr(estrategia, "estocastica", False)
+
+@lru_cache(maxsize=None)
+def pagos_deterministas(estrategia_a, estrategia_b, rondas):
+    return jugar_partida(estrategia_a, estrategia_b, rondas)
+
+# Estrategia de memoria uno: probabilidad de cooperar en la primera ronda y
+# tras cada resultado anterior (CC, CT, TC, TT) desde el punto de vista propio
+class MemoriaUno:
+    RESULTADOS = [('C', 'C'), ('C', 'T'), ('T', 'C'), ('T', 'T')]
+
+    def __init__(self, p_inicial, p_cc, p_ct, p_tc, p_tt, nombre=None):
+        self.probs = (p_inicial, p_cc, p_ct, p_tc, p_tt)
+        self.estocastica = any(0 < p < 1 for p in self.probs)
+        self.__name__ = nombre or "memoria_uno" + str(self.probs)
+
+    def __call__(self, history):
+        p = self.probs[0] if not history else self.probs[1 + self.RESULTADOS.index(history[-1])]
+        return 'C' if random.random() < p else 'T'
+
+    def __eq__(self, otra):
+        return isinstance(otra, MemoriaUno) and self.probs == otra.probs
+
+    def __hash__(self):
+        return hash(self.probs)
+
+def _pagos_montecarlo(trabajo):
+    # Se ejecuta en un proceso hijo: media de varias partidas con su propia semilla
+    estrategia_a, estrategia_b, rondas, repeticiones, semilla = trabajo
+    random.seed(semilla)
+    total_a = total_b = 0
+    for _ in range(repeticiones):
+        a, b = jugar_partida(estrategia_a, estrategia_b, rondas)
+        total_a += a
+        total_b += b
+    return total_a / repeticiones, total_b / repeticiones
+
+def matriz_pagos(estrategias, rondas=5, repeticiones=200, procesos=None, semilla=0):
+    """
+    M[i, j] = pago medio de la estrategia i contra la j en una partida de `rondas`.
+    Los pares deterministas salen de la caché; los estocásticos se estiman por
+    Monte Carlo repartidos entre procesos.
+    """
+    k = len(estrategias)
+    M = np.zeros((k, k))
+    trabajos, posiciones = [], []
+    for i in range(k):
+        for j in range(i, k):
+            a, b = estrategias[i], estrategias[j]
+            if es_estocastica(a) or es_estocastica(b):
+                trabajos.append((a, b, rondas, repeticiones, semilla + len(trabajos)))
+                posiciones.append((i, j))
+            else:
+                M[i, j], M[j, i] = pagos_deterministas(a, b, rondas)
+    if trabajos:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = pool.map(_pagos_montecarlo, trabajos, chunksize=max(1, len(trabajos) // 64))
+            for (i, j), (pa, pb) in zip(posiciones, resultados):
+                if i == j:
+                    pa = pb = (pa + pb) / 2
+                M[i, j], M[j, i] = pa, pb
+    return M
+
+def matriz_pagos_memoria_uno(probs, rondas=5, bloque=256):
+    """
+    Pagos esperados exactos entre estrategias de memoria uno (probs: k × 5),
+    todos los pares a la vez con una cadena de Markov de 4 estados (CC, CT, TC, TT).
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    k = len(probs)
+    pago = np.array([RECOMPENSAS[r][0] for r in MemoriaUno.RESULTADOS], dtype=np.float64)
+    intercambio = [0, 2, 1, 3]  # CT desde i es TC desde j
+    M = np.zeros((k, k))
+    pj = probs[:, 1:][:, intercambio]                         # (k, 4)
+    for lo in range(0, k, bloque):
+        pi = probs[lo:lo + bloque, None, 1:]                   # (b, 1, 4)
+        a = probs[lo:lo + bloque, 0][:, None]
+        b = probs[:, 0][None, :]
+        v = np.stack([a * b, a * (1 - b), (1 - a) * b, (1 - a) * (1 - b)], axis=-1)
+        total = v @ pago
+        for _ in range(rondas - 1):
+            # Probabilidad de que i coopere (o no) desde cada estado anterior
+            coopera = v * pi
+            no_coopera = v - coopera
+            cc = np.einsum("bks,ks->bk", coopera, pj)
+            tc = np.einsum("bks,ks->bk", no_coopera, pj)
+            v = np.stack([cc, coopera.sum(-1) - cc, tc, no_coopera.sum(-1) - tc], axis=-1)
+            total += v @ pago
+        M[lo:lo + bloque] = total
+    return M
+
+# --- Dinámica del replicador ---
+# En lugar de una población de objetos Jugador, se siguen las proporciones x
+# de cada estrategia: x_i' = x_i * f_i / f_medio con f = M x (pagos desplazados
+# para que sean positivos).
+def dinamica_replicador(M, x0=None, generaciones=100, tol=1e-10):
+    M = np.asarray(M, dtype=np.float64)
+    M = M - M.min() + 1.0
+    x = np.full(len(M), 1.0 / len(M)) if x0 is None else np.asarray(x0, dtype=np.float64)
+    x = x / x.sum()
+    historia = [x]
+    for _ in range(generaciones):
+        f = M @ x
+        nuevo = x * f / (x @ f)
+        historia.append(nuevo)
+        if np.abs(nuevo - x).max() < tol:
+            x = nuevo
+            break
+        x = nuevo
+    return x, np.array(historia)
+
+# Versión de simular_generaciones que usa la caché: la puntuación de cada
+# jugador es la suma de pagos contra el resto sin volver a jugar las partidas
+def simular_generaciones_cache(generaciones=10, n=10, rondas=5):
+    poblacion = [e for _ in range(n // 3) for e in (cooperador, traidor, tit_for_tat)]
+    for gen in range(generaciones):
+        print(f"\n--- Generación {gen+1} (caché) ---")
+        scores = [0] * len(poblacion)
+        for i in range(len(poblacion)):
+            for j in range(i + 1, len(poblacion)):
+                s1, s2 = pagos_deterministas(poblacion[i], poblacion[j], rondas)
+                scores[i] += s1
+                scores[j] += s2
+        ranking = sorted(zip(scores, [e.__name__ for e in poblacion]), reverse=True)
+        for s, name in ranking:
+            print(f"{name}: {s}")
+        orden = sorted(range(len(poblacion)), key=lambda i: scores[i], reverse=True)
+        poblacion = [poblacion[i] for i in orden[:len(poblacion) // 2] for _ in range(2)]
+    return poblacion
+
 simular_generaciones(10, 12)
+
+if __name__ == "__main__":
+    simular_generaciones_cache(3, 12)
+    print(f"\n🗃️ Caché de pagos: {pagos_deterministas.cache_info()}")
+
+    # Las tres estrategias clásicas escritas como memoria uno dan los mismos pagos
+    clasicas = [(1, 1, 1, 1, 1), (0, 0, 0, 0, 0), (1, 1, 0, 1, 0)]
+    exacta = matriz_pagos_memoria_uno(clasicas)
+    cacheada = matriz_pagos([cooperador, traidor, tit_for_tat])
+    print(f"✔️ Memoria uno exacta = caché: {np.allclose(exacta, cacheada)}")
+
+    # Pares estocásticos evaluados en paralelo
+    estocasticas = [MemoriaUno(0.5, 0.9, 0.1, 0.9, 0.1, "generoso"), MemoriaUno(1, 1, 0, 1, 0, "tft")]
+    inicio = time.perf_counter()
+    print(f"🎲 Monte Carlo en paralelo:\n{matriz_pagos(estocasticas, repeticiones=2000)}"
+          f" ({time.perf_counter() - inicio:.2f} s)")
+
+    # Replicador sobre 1000 estrategias de memoria uno aleatorias
+    rng = np.random.default_rng(0)
+    probs = rng.random((1000, 5))
+    inicio = time.perf_counter()
+    M = matriz_pagos_memoria_uno(probs, rondas=20)
+    x, historia = dinamica_replicador(M, generaciones=500)
+    print(f"🧬 1000 estrategias: {len(historia) - 1} generaciones en {time.perf_counter() - inicio:.2f} s")
+    for i in np.argsort(-x)[:3]:
+        print(f"   {np.round(probs[i], 2)} → {x[i]:.3f}")
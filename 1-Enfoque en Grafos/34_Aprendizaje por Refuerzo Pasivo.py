@@ -1,4 +1,6 @@
 import random
+import itertools
+import numpy as np
 
 # Configuración del restaurante
 mesas = [0, 1, 2, 3, 4]
@@ -46,3 +48,77 @@ for ep in range(episodes):
 print("\n--- Valores aprendidos de cada mesa ---")
 for mesa in mesas:
     print(f"Mesa {mesa}: Valor estimado = {values[mesa]:.2f}")
+
+
+# --- Estimadores incrementales con memoria constante ---
+# El bucle anterior guarda todos los retornos y recalcula la media en cada
+# visita. Estos estimadores solo guardan arrays de tamaño fijo (uno por
+# estado), así que pueden aprender de un flujo de episodios sin fin.
+# Cada episodio es una lista de (estado, recompensa) como en generate_episode.
+
+def flujo_episodios(n=None):
+    # Generador de episodios; con n=None no termina nunca
+    contador = itertools.count() if n is None else range(n)
+    for _ in contador:
+        yield generate_episode()
+
+class MonteCarloIncremental:
+    # Media incremental de los retornos: V += (G - V) / N
+    def __init__(self, n_estados, gamma):
+        self.V = np.zeros(n_estados)
+        self.N = np.zeros(n_estados, dtype=np.int64)
+        self.gamma = gamma
+
+    def actualizar(self, episodio):
+        G = 0.0
+        for estado, recompensa in reversed(episodio):
+            G = recompensa + self.gamma * G
+            self.N[estado] += 1
+            self.V[estado] += (G - self.V[estado]) / self.N[estado]
+
+class TD0:
+    # V(s) += α [r + γ V(s') - V(s)], con V(terminal) = 0
+    def __init__(self, n_estados, gamma, alpha=0.1):
+        self.V = np.zeros(n_estados)
+        self.gamma = gamma
+        self.alpha = alpha
+
+    def actualizar(self, episodio):
+        for t, (estado, recompensa) in enumerate(episodio):
+            siguiente = self.V[episodio[t + 1][0]] if t + 1 < len(episodio) else 0.0
+            self.V[estado] += self.alpha * (recompensa + self.gamma * siguiente - self.V[estado])
+
+class TDLambda:
+    # TD(λ) con trazas de elegibilidad acumulativas: cada error TD se reparte
+    # entre todos los estados visitados, con peso que decae como (γλ)^k
+    def __init__(self, n_estados, gamma, alpha=0.1, lam=0.8):
+        self.V = np.zeros(n_estados)
+        self.trazas = np.zeros(n_estados)
+        self.gamma = gamma
+        self.alpha = alpha
+        self.lam = lam
+
+    def actualizar(self, episodio):
+        self.trazas[:] = 0.0
+        for t, (estado, recompensa) in enumerate(episodio):
+            siguiente = self.V[episodio[t + 1][0]] if t + 1 < len(episodio) else 0.0
+            delta = recompensa + self.gamma * siguiente - self.V[estado]
+            self.trazas *= self.gamma * self.lam
+            self.trazas[estado] += 1.0
+            self.V += self.alpha * delta * self.trazas
+
+def aprender(estimador, episodios):
+    for episodio in episodios:
+        estimador.actualizar(episodio)
+    return estimador.V
+
+if __name__ == "__main__":
+    print("\n--- Estimadores incrementales ---")
+    estimadores = {
+        "MC incremental": MonteCarloIncremental(len(mesas), gamma),
+        "TD(0)": TD0(len(mesas), gamma, alpha=0.05),
+        "TD(λ=0.8)": TDLambda(len(mesas), gamma, alpha=0.05, lam=0.8),
+    }
+    for nombre, estimador in estimadores.items():
+        V = aprender(estimador, flujo_episodios(episodes))
+        print(f"{nombre:>15}: " + "  ".join(f"Mesa {m}={V[m]:.2f}" for m in mesas))
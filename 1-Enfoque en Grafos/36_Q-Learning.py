@@ -1,4 +1,6 @@
 import random  # Importamos la librería 'random' para decisiones aleatorias en el agente (exploración)
+import time    # Para medir la velocidad del entrenamiento vectorizado
+import numpy as np  # Arrays para la tabla Q y los entornos en paralelo
 
 # -----------------------------
 # DEFINICIÓN DEL ENTORNO
@@ -96,3 +98,189 @@ for estado in estados:
     if acciones_posibles.get(estado):  # Solo mostramos estados con acciones posibles
         mejor_accion = max(acciones_posibles[estado], key=lambda a: Q[(estado, a)])  # Escogemos la mejor acción
         print(f"En nodo {estado}, ir a {mejor_accion} (Q: {Q[(estado, mejor_accion)]:.2f})")
+
+# -----------------------------
+# NÚCLEO TABULAR VECTORIZADO
+# -----------------------------
+
+# La versión anterior guarda Q en un diccionario con claves (estado, acción)
+# y avanza un único entorno con random.random() por decisión. Este núcleo
+# sirve para cualquier entorno tabular determinista (el grafo de este script,
+# las cuevas de la versión activa o la cuadrícula de la búsqueda de política):
+#   - Q es un array (estados × acciones) indexado por enteros
+#   - miles de copias del entorno avanzan a la vez
+#   - la selección ε-greedy se hace para todas las copias de golpe
+#   - opcionalmente se guarda la experiencia en un buffer circular
+# Como cada script se ejecuta por separado y no importa a los demás, el núcleo
+# vive solo aquí: 35_Aprendizaje por Refuerzo Activo.py y 38_Búsqueda de la
+# Política.py conservan su Q en diccionario. Para usarlo con ellos basta copiar
+# estas clases y compilar su entorno con EntornoTabular.
+
+class EntornoTabular:
+    # siguiente[s, a] y recompensa[s, a] describen la transición; valida[s, a]
+    # marca las acciones permitidas y terminal[s] los estados finales
+    def __init__(self, siguiente, recompensa, valida, terminal, inicio=0):
+        self.siguiente = np.asarray(siguiente, dtype=np.int64)
+        self.recompensa = np.asarray(recompensa, dtype=np.float64)
+        self.valida = np.asarray(valida, dtype=bool)
+        self.terminal = np.asarray(terminal, dtype=bool)
+        self.inicio = inicio
+        self.n_estados, self.n_acciones = self.siguiente.shape
+
+    @classmethod
+    def desde_grafo(cls, estados, acciones_posibles, recompensas, inicio=0):
+        # La acción k desde un nodo es ir a su k-ésimo vecino en acciones_posibles
+        indice = {e: i for i, e in enumerate(estados)}
+        A = max(len(v) for v in acciones_posibles.values())
+        siguiente = np.tile(np.arange(len(estados))[:, None], (1, A))
+        recompensa = np.zeros((len(estados), A))
+        valida = np.zeros((len(estados), A), dtype=bool)
+        for e, destinos in acciones_posibles.items():
+            for k, d in enumerate(destinos):
+                siguiente[indice[e], k] = indice[d]
+                recompensa[indice[e], k] = recompensas[(e, d)]
+                valida[indice[e], k] = True
+        terminal = ~valida.any(axis=1)
+        return cls(siguiente, recompensa, valida, terminal, indice[inicio])
+
+    @classmethod
+    def desde_cuadricula(cls, recompensas_celdas, meta, inicio=(0, 0)):
+        # Cuadrícula con acciones arriba/abajo/izquierda/derecha; salirse del borde no mueve.
+        # La recompensa es la de la celda de llegada.
+        filas, columnas = recompensas_celdas.shape
+        i, j = np.divmod(np.arange(filas * columnas), columnas)
+        movimientos = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        siguiente = np.stack([np.clip(i + di, 0, filas - 1) * columnas + np.clip(j + dj, 0, columnas - 1)
+                              for di, dj in movimientos], axis=1)
+        recompensa = recompensas_celdas.ravel()[siguiente]
+        terminal = np.zeros(filas * columnas, dtype=bool)
+        terminal[meta[0] * columnas + meta[1]] = True
+        valida = np.ones_like(siguiente, dtype=bool)
+        return cls(siguiente, recompensa, valida, terminal, inicio[0] * columnas + inicio[1])
+
+
+class EntornosVectorizados:
+    # n copias del mismo entorno que avanzan juntas; al terminar (o agotar
+    # max_pasos) cada copia vuelve sola al estado inicial, o a un estado no
+    # terminal al azar si inicios_aleatorios=True (mejor cobertura del espacio)
+    def __init__(self, entorno, n, max_pasos=200, inicios_aleatorios=False, rng=None):
+        self.entorno = entorno
+        self.n = n
+        self.max_pasos = max_pasos
+        self.rng = rng or np.random.default_rng()
+        self.no_terminales = np.flatnonzero(~entorno.terminal) if inicios_aleatorios else None
+        self.estados = self._inicios(n)
+        self.pasos = np.zeros(n, dtype=np.int64)
+
+    def _inicios(self, k):
+        if self.no_terminales is None:
+            return np.full(k, self.entorno.inicio, dtype=np.int64)
+        return self.rng.choice(self.no_terminales, size=k)
+
+    def step(self, acciones):
+        e = self.entorno
+        siguientes = e.siguiente[self.estados, acciones]
+        recompensas = e.recompensa[self.estados, acciones]
+        terminados = e.terminal[siguientes]
+        self.pasos += 1
+        reiniciar = terminados | (self.pasos >= self.max_pasos)
+        self.estados = siguientes.copy()
+        self.estados[reiniciar] = self._inicios(int(reiniciar.sum()))
+        self.pasos[reiniciar] = 0
+        return siguientes, recompensas, terminados
+
+
+class BufferRepeticion:
+    # Buffer circular de tamaño fijo: las transiciones nuevas sobrescriben las más antiguas
+    def __init__(self, capacidad, rng):
+        self.capacidad = capacidad
+        self.rng = rng
+        self.s = np.zeros(capacidad, dtype=np.int64)
+        self.a = np.zeros(capacidad, dtype=np.int64)
+        self.r = np.zeros(capacidad)
+        self.s2 = np.zeros(capacidad, dtype=np.int64)
+        self.fin = np.zeros(capacidad, dtype=bool)
+        self.posicion = 0
+        self.tamano = 0
+
+    def agregar(self, s, a, r, s2, fin):
+        idx = (self.posicion + np.arange(len(s))) % self.capacidad
+        self.s[idx], self.a[idx], self.r[idx], self.s2[idx], self.fin[idx] = s, a, r, s2, fin
+        self.posicion = (self.posicion + len(s)) % self.capacidad
+        self.tamano = min(self.tamano + len(s), self.capacidad)
+
+    def muestrear(self, k):
+        idx = self.rng.integers(self.tamano, size=k)
+        return self.s[idx], self.a[idx], self.r[idx], self.s2[idx], self.fin[idx]
+
+
+class QTabular:
+    def __init__(self, entorno, alpha=0.1, gamma=0.9, epsilon=0.1, semilla=None):
+        self.entorno = entorno
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(semilla)
+        self.Q = np.zeros((entorno.n_estados, entorno.n_acciones))
+
+    def elegir(self, estados):
+        # ε-greedy por lotes; los empates y la exploración se resuelven con números aleatorios
+        valida = self.entorno.valida[estados]
+        q = np.where(valida, self.Q[estados], -np.inf)
+        mejores = (q == q.max(axis=1, keepdims=True)) & valida
+        explorar = self.rng.random(len(estados)) < self.epsilon
+        candidatas = np.where(explorar[:, None], valida, mejores)
+        return np.argmax(candidatas * self.rng.random(candidatas.shape), axis=1)
+
+    def actualizar(self, s, a, r, s2, fin):
+        # Q-learning por lotes. Si varias copias actualizan el mismo (s, a) en el
+        # mismo paso se usa la media de sus errores TD (no la suma)
+        q_sig = np.where(self.entorno.valida[s2], self.Q[s2], -np.inf).max(axis=1)
+        q_sig = np.where(fin | ~np.isfinite(q_sig), 0.0, q_sig)
+        error = r + self.gamma * q_sig - self.Q[s, a]
+        plano = s * self.entorno.n_acciones + a
+        suma = np.bincount(plano, weights=error, minlength=self.Q.size)
+        cuenta = np.bincount(plano, minlength=self.Q.size)
+        self.Q.ravel()[:] += self.alpha * np.divide(suma, cuenta, out=np.zeros_like(suma), where=cuenta > 0)
+
+    def politica(self):
+        return np.where(self.entorno.valida, self.Q, -np.inf).argmax(axis=1)
+
+
+def entrenar_vectorizado(entorno, n_entornos=4096, pasos=200, buffer=None, tam_lote=1024,
+                         inicios_aleatorios=False, **kwargs):
+    agente = QTabular(entorno, **kwargs)
+    copias = EntornosVectorizados(entorno, n_entornos, inicios_aleatorios=inicios_aleatorios, rng=agente.rng)
+    for _ in range(pasos):
+        s = copias.estados
+        a = agente.elegir(s)
+        s2, r, fin = copias.step(a)
+        agente.actualizar(s, a, r, s2, fin)
+        if buffer is not None:
+            buffer.agregar(s, a, r, s2, fin)
+            agente.actualizar(*buffer.muestrear(tam_lote))
+    return agente
+
+if __name__ == "__main__":
+    entorno = EntornoTabular.desde_grafo(estados, acciones_posibles, recompensas)
+    inicio = time.perf_counter()
+    agente = entrenar_vectorizado(entorno, n_entornos=4096, pasos=300, alpha=alpha, gamma=gamma,
+                                  epsilon=epsilon, semilla=0,
+                                  buffer=BufferRepeticion(100000, np.random.default_rng(0)))
+    tiempo = time.perf_counter() - inicio
+    print(f"\n--- Política vectorizada (4096 entornos × 300 pasos en {tiempo:.2f} s) ---")
+    pi = agente.politica()
+    for estado in estados:
+        if acciones_posibles.get(estado):
+            destino = acciones_posibles[estado][pi[estado]]
+            print(f"En nodo {estado}, ir a {destino} (Q: {agente.Q[estado, pi[estado]]:.2f})")
+
+    # La misma maquinaria sirve para una cuadrícula como la de la búsqueda de política
+    rng = np.random.default_rng(1)
+    celdas = rng.uniform(-1, 1, (5, 5))
+    celdas[4, 4] = 10
+    rejilla = EntornoTabular.desde_cuadricula(celdas, meta=(4, 4))
+    agente = entrenar_vectorizado(rejilla, n_entornos=2048, pasos=500, inicios_aleatorios=True, semilla=1)
+    flechas = np.array(['↑', '↓', '←', '→'])[agente.politica()].reshape(5, 5)
+    flechas[4, 4] = '★'
+    print("\n".join(" ".join(fila) for fila in flechas))
@@ -1,4 +1,6 @@
 import random
+import time
+from abc import ABC, abstractmethod
 import numpy as np
 
 # Parámetros del entorno
@@ -77,3 +79,103 @@ plt.imshow(recompensas, cmap='coolwarm', origin='lower')
 plt.colorbar(label='Recompensa')
 plt.title("Mapa de Recompensas del Entorno")
 plt.show()
+
+
+# --- Motor de bandidos multibrazo por lotes ---
+# Con decenas de miles de bandidos independientes no se puede llamar a
+# elegir_accion uno a uno. El estado de TODOS los bandidos vive en arrays
+# contiguos (bandidos × brazos): una llamada elige el brazo de cada bandido y
+# otra aplica un lote de recompensas.
+class BanditsVectorizados(ABC):
+    def __init__(self, n_bandits, n_brazos, semilla=None):
+        self.n_bandits = n_bandits
+        self.n_brazos = n_brazos
+        self.rng = np.random.default_rng(semilla)
+        self.conteos = np.zeros((n_bandits, n_brazos))
+        self.sumas = np.zeros((n_bandits, n_brazos))
+
+    def medias(self):
+        return np.divide(self.sumas, self.conteos, out=np.zeros_like(self.sumas), where=self.conteos > 0)
+
+    def argmax_aleatorio(self, valores):
+        # argmax por fila deshaciendo empates al azar, como random.choice(mejores_acciones)
+        empatados = valores == valores.max(axis=1, keepdims=True)
+        return np.where(empatados, self.rng.random(valores.shape), -1.0).argmax(axis=1)
+
+    @abstractmethod
+    def seleccionar(self):
+        # Devuelve el brazo elegido por cada bandido, array (n_bandits,)
+        ...
+
+    def actualizar(self, bandits, brazos, recompensas):
+        # np.add.at acumula bien aunque un mismo (bandido, brazo) se repita en el lote
+        np.add.at(self.conteos, (bandits, brazos), 1)
+        np.add.at(self.sumas, (bandits, brazos), recompensas)
+
+class EpsilonGreedyBandits(BanditsVectorizados):
+    def __init__(self, n_bandits, n_brazos, epsilon=0.1, semilla=None):
+        super().__init__(n_bandits, n_brazos, semilla)
+        self.epsilon = epsilon
+
+    def seleccionar(self):
+        codiciosos = self.argmax_aleatorio(self.medias())
+        aleatorios = self.rng.integers(self.n_brazos, size=self.n_bandits)
+        return np.where(self.rng.random(self.n_bandits) < self.epsilon, aleatorios, codiciosos)
+
+class UCB1Bandits(BanditsVectorizados):
+    def __init__(self, n_bandits, n_brazos, c=1.0, semilla=None):
+        super().__init__(n_bandits, n_brazos, semilla)
+        self.c = c
+
+    def seleccionar(self):
+        # media + c·sqrt(2 ln t / n); los brazos sin probar van primero
+        t = self.conteos.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bono = self.c * np.sqrt(2 * np.log(np.maximum(t, 1)) / self.conteos)
+        return self.argmax_aleatorio(np.where(self.conteos > 0, self.medias() + bono, np.inf))
+
+class ThompsonBetaBandits(BanditsVectorizados):
+    # Recompensas en [0, 1] con prior Beta(1, 1) por brazo
+    def seleccionar(self):
+        muestras = self.rng.beta(1 + self.sumas, 1 + self.conteos - self.sumas)
+        return muestras.argmax(axis=1)
+
+class ThompsonGaussBandits(BanditsVectorizados):
+    # Prior N(0, σ²) y varianza de ruido σ² conocida: posterior N(suma/(n+1), σ²/(n+1))
+    def __init__(self, n_bandits, n_brazos, sigma=1.0, semilla=None):
+        super().__init__(n_bandits, n_brazos, semilla)
+        self.sigma = sigma
+
+    def seleccionar(self):
+        n = self.conteos + 1
+        muestras = self.sumas / n + self.sigma / np.sqrt(n) * self.rng.standard_normal(self.conteos.shape)
+        return muestras.argmax(axis=1)
+
+def simular_bandits(bandits, probs, pasos, semilla=None):
+    # probs (bandidos × brazos): probabilidad de recompensa 1 de cada brazo
+    rng = np.random.default_rng(semilla)
+    todos = np.arange(bandits.n_bandits)
+    mejor = probs.max(axis=1)
+    arrepentimiento = 0.0
+    inicio = time.perf_counter()
+    for _ in range(pasos):
+        brazos = bandits.seleccionar()
+        p = probs[todos, brazos]
+        recompensas = (rng.random(bandits.n_bandits) < p).astype(np.float64)
+        bandits.actualizar(todos, brazos, recompensas)
+        arrepentimiento += (mejor - p).sum()
+    tiempo = time.perf_counter() - inicio
+    return {"decisiones_por_segundo": bandits.n_bandits * pasos / tiempo,
+            "arrepentimiento_medio": arrepentimiento / bandits.n_bandits, "tiempo": tiempo}
+
+if __name__ == "__main__":
+    n_bandits, n_brazos, pasos = 20000, 10, 200
+    probs = np.random.default_rng(0).uniform(0, 0.2, (n_bandits, n_brazos))
+    print(f"\n🎰 {n_bandits} bandidos × {n_brazos} brazos × {pasos} pasos")
+    for nombre, bandits in [("ε-greedy", EpsilonGreedyBandits(n_bandits, n_brazos, 0.1, semilla=1)),
+                            ("UCB1", UCB1Bandits(n_bandits, n_brazos, semilla=1)),
+                            ("Thompson Beta", ThompsonBetaBandits(n_bandits, n_brazos, semilla=1)),
+                            ("Thompson Gauss", ThompsonGaussBandits(n_bandits, n_brazos, 0.5, semilla=1))]:
+        r = simular_bandits(bandits, probs, pasos, semilla=2)
+        print(f"{nombre:>15}: {r['decisiones_por_segundo']:,.0f} decisiones/s, "
+              f"arrepentimiento medio {r['arrepentimiento_medio']:.2f}")
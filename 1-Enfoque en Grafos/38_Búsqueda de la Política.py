@@ -1,4 +1,6 @@
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 # Parámetros del entorno
@@ -14,6 +16,7 @@ alpha = 0.1    # Tasa de aprendizaje
 gamma = 0.9    # Factor de descuento
 epsilon = 0.1  # Probabilidad de exploración
 episodios = 1000
+max_pasos = 500  # Tope de pasos por episodio: ε-greedy puede quedarse dando vueltas
 
 # Inicialización de Q(s, a)
 Q = {}
@@ -43,38 +46,171 @@ def mover(estado, accion):
         return (x, y + 1)
     return estado  # Si se sale del borde, el agente permanece en el mismo estado
 
-# Q-learning
-for episodio in range(episodios):
-    estado = (0, 0)  # El agente empieza en la esquina superior izquierda
-    while estado != meta:
-        accion = elegir_accion(estado)
-        siguiente_estado = mover(estado, accion)
-        recompensa = recompensas[siguiente_estado]
-        futuros_qs = [Q.get((siguiente_estado, a), 0) for a in acciones]
-        max_q_siguiente = max(futuros_qs) if futuros_qs else 0
-        Q[(estado, accion)] = Q.get((estado, accion), 0) + alpha * (recompensa + gamma * max_q_siguiente - Q.get((estado, accion), 0))
-        estado = siguiente_estado
-
-# Búsqueda de la política
-politica = {}
-
-for i in range(size):
-    for j in range(size):
-        estado = (i, j)
-        if estado == meta:
-            politica[estado] = "META"
-        else:
-            # Obtener la acción recomendada
-            valores_q = [Q.get((estado, a), 0) for a in acciones]
-            max_q = max(valores_q)
-            index = valores_q.index(max_q)
-            mejor_accion = acciones[index]
-            politica[estado] = mejor_accion
-
-# Mostrar la política aprendida
-print("\n--- Política final aprendida ---")
-for i in range(size):
-    for j in range(size):
-        estado = (i, j)
-        print(f"En {estado}, la mejor acción es: {politica[estado]}")
+# --- Búsqueda directa de la política ---
+# La línea base (bloque principal) deduce la política del argmax de Q. Aquí se optimiza directamente
+# una política softmax parametrizada θ (estados × acciones):
+#   - REINFORCE con línea base (gradiente de la política)
+#   - Método de entropía cruzada (CEM) sobre una población de vectores θ
+# Los episodios de toda la población se simulan a la vez con arrays (o
+# repartidos entre procesos) y se mide el tiempo de cada actualización.
 
+def tabla_transiciones():
+    # siguiente[s, a] con la misma lógica que mover(); recompensa = la de la celda de llegada
+    siguiente = np.zeros((size * size, len(acciones)), dtype=np.int64)
+    for i in range(size):
+        for j in range(size):
+            for a, accion in enumerate(acciones):
+                x, y = mover((i, j), accion)
+                siguiente[i * size + j, a] = x * size + y
+    return siguiente, recompensas.ravel()[siguiente]
+
+SIGUIENTE, RECOMPENSA = tabla_transiciones()
+META = meta[0] * size + meta[1]
+
+def softmax(logits):
+    z = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+def rollouts(thetas, n_episodios, horizonte=50, rng=None,
+             siguiente=SIGUIENTE, recompensa=RECOMPENSA, meta_idx=META):
+    """
+    Simula n_episodios por cada θ de la población (P × S × A) en paralelo.
+    Devuelve estados, acciones, recompensas y máscara de pasos vivos con forma
+    (horizonte, P, n_episodios).
+    """
+    rng = rng or np.random.default_rng()
+    P = len(thetas)
+    estado = np.zeros((P, n_episodios), dtype=np.int64)
+    vivo = np.ones((P, n_episodios), dtype=bool)
+    fila = np.arange(P)[:, None]
+    hist_s = np.zeros((horizonte, P, n_episodios), dtype=np.int64)
+    hist_a = np.zeros_like(hist_s)
+    hist_r = np.zeros((horizonte, P, n_episodios))
+    hist_v = np.zeros((horizonte, P, n_episodios), dtype=bool)
+    for t in range(horizonte):
+        probs = softmax(thetas[fila, estado])
+        accion = (probs.cumsum(axis=-1) < rng.random((P, n_episodios, 1))).sum(axis=-1)
+        accion = np.minimum(accion, len(acciones) - 1)
+        hist_s[t], hist_a[t], hist_v[t] = estado, accion, vivo
+        hist_r[t] = np.where(vivo, recompensa[estado, accion], 0.0)
+        estado = np.where(vivo, siguiente[estado, accion], estado)
+        vivo &= estado != meta_idx
+        if not vivo.any():
+            return hist_s[:t + 1], hist_a[:t + 1], hist_r[:t + 1], hist_v[:t + 1]
+    return hist_s, hist_a, hist_r, hist_v
+
+def retornos(hist_r, gamma):
+    G = np.zeros_like(hist_r)
+    acumulado = np.zeros(hist_r.shape[1:])
+    for t in reversed(range(len(hist_r))):
+        acumulado = hist_r[t] + gamma * acumulado
+        G[t] = acumulado
+    return G
+
+def reinforce(iteraciones=200, n_episodios=256, lr=0.1, horizonte=50, semilla=None):
+    # Gradiente: Σ_t (G_t - b_t) ∇ log π(a_t | s_t); para softmax tabular
+    # ∇_θ[s] log π(a | s) = onehot(a) - π(· | s). b_t es la media de G_t del lote.
+    rng = np.random.default_rng(semilla)
+    theta = np.zeros((size * size, len(acciones)))
+    historial = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        s, a, r, v = rollouts(theta[None], n_episodios, horizonte, rng)
+        s, a, r, v = s[:, 0], a[:, 0], r[:, 0], v[:, 0]
+        G = retornos(r, gamma)
+        ventaja = np.where(v, G - G.mean(axis=1, keepdims=True), 0.0)
+        grad = np.zeros_like(theta)
+        # Parte -π(·|s) del gradiente
+        np.add.at(grad, s[v], -ventaja[v][:, None] * softmax(theta[s[v]]))
+        # Parte onehot(a) del gradiente
+        np.add.at(grad, (s[v], a[v]), ventaja[v])
+        theta += lr * grad / n_episodios
+        historial.append({"retorno": G[0].mean(), "tiempo": time.perf_counter() - inicio})
+    return theta, historial
+
+def _evaluar_bloque(trabajo):
+    # Las tablas viajan con el trabajo: un proceso hijo nuevo generaría otras recompensas al importar
+    thetas, n_episodios, horizonte, semilla, tablas = trabajo
+    _, _, r, _ = rollouts(thetas, n_episodios, horizonte, np.random.default_rng(semilla), *tablas)
+    return retornos(r, gamma)[0].mean(axis=1)
+
+def evaluar_poblacion(thetas, n_episodios, horizonte, rng, procesos=None, pool=None):
+    # Retorno medio de cada θ; con un pool se reparte la población por bloques
+    if pool is None:
+        return _evaluar_bloque((thetas, n_episodios, horizonte, rng.integers(2**32), ()))
+    bloques = np.array_split(thetas, procesos)
+    tablas = (SIGUIENTE, RECOMPENSA, META)
+    trabajos = [(b, n_episodios, horizonte, rng.integers(2**32), tablas) for b in bloques if len(b)]
+    return np.concatenate(list(pool.map(_evaluar_bloque, trabajos)))
+
+def entropia_cruzada(iteraciones=50, poblacion=200, elite=0.2, n_episodios=16, horizonte=50,
+                     procesos=None, semilla=None):
+    rng = np.random.default_rng(semilla)
+    forma = (size * size, len(acciones))
+    media, desviacion = np.zeros(forma), np.ones(forma) * 2.0
+    n_elite = max(1, int(poblacion * elite))
+    historial = []
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos else None
+    try:
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            thetas = media + desviacion * rng.standard_normal((poblacion,) + forma)
+            puntuaciones = evaluar_poblacion(thetas, n_episodios, horizonte, rng, procesos, pool)
+            elites = thetas[np.argpartition(puntuaciones, poblacion - n_elite)[-n_elite:]]
+            media, desviacion = elites.mean(axis=0), elites.std(axis=0) + 0.05
+            historial.append({"retorno": np.sort(puntuaciones)[-n_elite:].mean(),
+                              "tiempo": time.perf_counter() - inicio})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return media, historial
+
+if __name__ == "__main__":
+    # Q-learning (línea base). Solo se entrena al ejecutar el script: así la búsqueda
+    # directa de la política y los procesos hijos (que reimportan el módulo) no dependen de ella
+    for episodio in range(episodios):
+        estado = (0, 0)  # El agente empieza en la esquina superior izquierda
+        for paso in range(max_pasos):
+            if estado == meta:
+                break
+            accion = elegir_accion(estado)
+            siguiente_estado = mover(estado, accion)
+            recompensa = recompensas[siguiente_estado]
+            futuros_qs = [Q.get((siguiente_estado, a), 0) for a in acciones]
+            max_q_siguiente = max(futuros_qs) if futuros_qs else 0
+            Q[(estado, accion)] = Q.get((estado, accion), 0) + alpha * (recompensa + gamma * max_q_siguiente - Q.get((estado, accion), 0))
+            estado = siguiente_estado
+
+    # Búsqueda de la política
+    politica = {}
+
+    for i in range(size):
+        for j in range(size):
+            estado = (i, j)
+            if estado == meta:
+                politica[estado] = "META"
+            else:
+                # Obtener la acción recomendada
+                valores_q = [Q.get((estado, a), 0) for a in acciones]
+                max_q = max(valores_q)
+                index = valores_q.index(max_q)
+                mejor_accion = acciones[index]
+                politica[estado] = mejor_accion
+
+    # Mostrar la política aprendida
+    print("\n--- Política final aprendida ---")
+    for i in range(size):
+        for j in range(size):
+            estado = (i, j)
+            print(f"En {estado}, la mejor acción es: {politica[estado]}")
+
+    nombres = np.array(['↑', '↓', '←', '→'])
+    for nombre, (theta, historial) in [
+            ("REINFORCE", reinforce(semilla=0)),
+            ("CEM", entropia_cruzada(semilla=0)),
+            ("CEM (2 procesos)", entropia_cruzada(iteraciones=10, procesos=2, semilla=0))]:
+        tiempo = np.mean([h["tiempo"] for h in historial]) * 1000
+        print(f"\n--- {nombre}: retorno {historial[-1]['retorno']:.2f}, {tiempo:.1f} ms por actualización ---")
+        flechas = nombres[theta.argmax(axis=1)].reshape(size, size)
+        flechas[meta] = '★'
+        print("\n".join(" ".join(fila) for fila in flechas))
@@ -6,6 +6,12 @@ import math
 # que combinan las ventajas de tuplas y diccionarios
 from collections import namedtuple
 
+# Importamos time para medir cuánto tardan las versiones vectorizadas
+import time
+
+# Importamos numpy para calcular heurísticas sobre muchos puntos a la vez
+import numpy as np
+
 # Creamos un tipo de dato llamado "Ciudad" usando namedtuple
 # Esto es como definir una clase minimalista con campos fijos:
 # - nombre: String con el nombre de la ciudad
@@ -68,4 +74,189 @@ print(f"📍 CDMX: {distancia_euclidiana(origen, destino):.2f} km")
 print(f"📍 GDL: {distancia_manhattan(origen, destino)} km")
 
 # Calculamos y mostramos la distancia Chebyshev
-print(f"📍 MTY: {distancia_chebyshev(origen, destino)} km")
\ No newline at end of file
+print(f"📍 MTY: {distancia_chebyshev(origen, destino)} km")
+
+# ============================================================
+# 🚀 VERSIONES VECTORIZADAS DE LAS HEURÍSTICAS
+# ============================================================
+# Las funciones anteriores comparan un par de ciudades por llamada. Cuando un
+# planificador necesita millones de evaluaciones, es mucho más rápido pasar
+# todas las coordenadas como un array (N, 2) y dejar que NumPy haga el cálculo.
+#
+# - objetivo con forma (2,)   -> resultado (N,)   : de N puntos a una meta
+# - objetivo con forma (M, 2) -> resultado (N, M) : todas las parejas
+
+# Convierte un diccionario de Ciudad en un array (N, 2) de coordenadas
+def coordenadas(ciudades_dict):
+    return np.array([[c.x, c.y] for c in ciudades_dict.values()], dtype=np.float64)
+
+# Diferencias por broadcasting: (N, 2) contra (2,) o contra (M, 2)
+def _diferencias(puntos, objetivo):
+    puntos = np.asarray(puntos, dtype=np.float64)
+    objetivo = np.asarray(objetivo, dtype=np.float64)
+    if objetivo.ndim == 1:
+        return puntos - objetivo
+    # (N, 1, 2) - (1, M, 2) -> (N, M, 2)
+    return puntos[:, None, :] - objetivo[None, :, :]
+
+def distancias_euclidianas(puntos, objetivo):
+    # Norma 2 sobre el último eje (dx, dy)
+    d = _diferencias(puntos, objetivo)
+    return np.sqrt((d * d).sum(axis=-1))
+
+def distancias_manhattan(puntos, objetivo):
+    # Suma de |dx| + |dy|
+    return np.abs(_diferencias(puntos, objetivo)).sum(axis=-1)
+
+def distancias_chebyshev(puntos, objetivo):
+    # Máximo entre |dx| y |dy|
+    return np.abs(_diferencias(puntos, objetivo)).max(axis=-1)
+
+
+# ============================================================
+# 🧩 BASES DE DATOS DE PATRONES (PDB) PARA PUZZLES DESLIZANTES
+# ============================================================
+# Una PDB guarda el coste exacto de colocar un subconjunto de fichas (el
+# "patrón") en su sitio, ignorando las demás. Se calcula una sola vez con una
+# búsqueda hacia atrás desde la meta y se guarda en un array compacto de
+# uint8; durante la búsqueda, consultar la heurística es una indexación O(1).
+#
+# Solo se cuentan los movimientos de fichas del patrón (PDB aditiva), así que
+# la suma de PDBs con patrones disjuntos sigue siendo admisible.
+#
+# Las posiciones de las k fichas son distintas entre sí, así que se indexan por
+# su rango como permutación parcial: la tabla tiene n!/(n-k)! entradas y la
+# construcción, que además sigue al hueco, n!/(n-k-1)! bytes más las capas de
+# la búsqueda. En el 15-puzzle un patrón de 5 fichas tarda unos segundos (0,5 MB
+# de tabla) y uno de 6 fichas algo más de un minuto y ~700 MB de pico (5,8 MB de
+# tabla); 7 fichas ya no es práctico con este diseño.
+
+class BaseDatosPatrones:
+    SIN_CALCULAR = 255
+
+    def __init__(self, ancho, alto, patron, objetivo=None):
+        # ancho x alto: tamaño del tablero
+        # patron: fichas (números > 0) que forman el patrón
+        # objetivo: ficha en cada celda de la meta (0 = hueco); por defecto 1, 2, ..., n-1, 0
+        self.ancho, self.alto = ancho, alto
+        self.n = ancho * alto
+        self.patron = list(patron)
+        self.objetivo = list(objetivo) if objetivo is not None else list(range(1, self.n)) + [0]
+        self.pesos = self._pesos(len(self.patron))
+        # vecinos[c] son las celdas a las que puede ir el hueco desde c, rellenado con -1 hasta 4
+        self.vecinos = np.full((self.n, 4), -1, dtype=np.int64)
+        for c in range(self.n):
+            self.vecinos[c, :len(self._vecinos(c))] = self._vecinos(c)
+        self.tabla = self._construir()
+
+    def _vecinos(self, celda):
+        # Celdas a las que puede moverse el hueco desde `celda`
+        fila, col = divmod(celda, self.ancho)
+        resultado = []
+        if fila > 0: resultado.append(celda - self.ancho)
+        if fila < self.alto - 1: resultado.append(celda + self.ancho)
+        if col > 0: resultado.append(celda - 1)
+        if col < self.ancho - 1: resultado.append(celda + 1)
+        return resultado
+
+    def _pesos(self, m):
+        # Peso de la posición i en el rango de una permutación parcial de m celdas: (n-1-i)! / (n-m)!
+        return np.array([math.perm(self.n - 1 - i, m - 1 - i) for i in range(m)], dtype=np.int64)
+
+    @staticmethod
+    def _rango(posiciones, pesos):
+        # Rango lexicográfico de cada fila de celdas distintas (N, m): cada celda cuenta
+        # cuántas de las libres son menores, descontando las ya usadas a su izquierda
+        rango = np.zeros(len(posiciones), dtype=np.int64)
+        for i, peso in enumerate(pesos):
+            rango += (posiciones[:, i] - (posiciones[:, :i] < posiciones[:, i:i + 1]).sum(axis=1)) * peso
+        return rango
+
+    def _construir(self):
+        k = len(self.patron)
+        n = self.n
+        # Estado abstracto: (posición de cada ficha del patrón, hueco). Con el hueco al final,
+        # el rango del estado es rango(fichas) * (n - k) + rango del hueco entre las celdas libres
+        pesos_estado = self._pesos(k + 1)
+        distancia = np.full(math.perm(n, k + 1), self.SIN_CALCULAR, dtype=np.uint8)
+        # Las celdas caben en int8 (o int16): las capas de la búsqueda ocupan 8 veces menos que en int64
+        celda = np.int8 if n < 128 else np.int16
+        inicio = np.array([[self.objetivo.index(t) for t in self.patron] + [self.objetivo.index(0)]],
+                          dtype=celda)
+
+        def visitar(estados, coste):
+            # Marca los estados aún sin coste y devuelve solo esos (sin repetidos)
+            rangos, primero = np.unique(self._rango(estados, pesos_estado), return_index=True)
+            nuevos = distancia[rangos] == self.SIN_CALCULAR
+            distancia[rangos[nuevos]] = coste
+            return estados[primero[nuevos]]
+
+        def sucesores(estados):
+            # Mueve el hueco en las 4 direcciones; devuelve (sin coste, con coste 1)
+            libres, empujes = [], []
+            for direccion in range(4):
+                destino = self.vecinos[estados[:, -1], direccion]
+                validos = destino >= 0
+                nuevos, destino = estados[validos].copy(), destino[validos]
+                choca = nuevos[:, :-1] == destino[:, None]
+                empuja = choca.any(axis=1)
+                # La ficha del patrón que ocupa el destino pasa a la celda que deja el hueco
+                nuevos[:, :-1][choca] = nuevos[empuja, -1]
+                nuevos[:, -1] = destino
+                libres.append(nuevos[~empuja])
+                empujes.append(nuevos[empuja])
+            return np.concatenate(libres), np.concatenate(empujes)
+
+        # BFS 0-1 por capas: mover el hueco sobre una celda libre cuesta 0, sobre una ficha
+        # del patrón cuesta 1. Cada capa de coste d es el cierre por movimientos gratis de su frontera
+        frontera, d = visitar(inicio, 0), 0
+        while len(frontera):
+            capa, actual = [frontera], frontera
+            while len(actual):
+                actual = visitar(sucesores(actual)[0], d)
+                capa.append(actual)
+            frontera = visitar(sucesores(np.concatenate(capa))[1], d + 1)
+            d += 1
+
+        # La heurística no depende del hueco: nos quedamos con el mínimo sobre su posición
+        return distancia.reshape(-1, n - k).min(axis=1)
+
+    def indice(self, posiciones):
+        # posiciones: (k,) o (N, k) con la celda de cada ficha del patrón
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        return self._rango(posiciones.reshape(-1, len(self.patron)), self.pesos).reshape(posiciones.shape[:-1])
+
+    def consultar(self, estado):
+        # estado: ficha en cada celda (0 = hueco), como en `objetivo`
+        return int(self.tabla[self.indice([estado.index(t) for t in self.patron])])
+
+    def consultar_lote(self, estados):
+        # estados: array (N, n) con la ficha de cada celda; devuelve N heurísticas
+        estados = np.asarray(estados)
+        posiciones = np.stack([np.argmax(estados == t, axis=1) for t in self.patron], axis=1)
+        return self.tabla[self.indice(posiciones)]
+
+# Suma de PDBs con patrones disjuntos (heurística aditiva admisible)
+def heuristica_pdb(estado, bases):
+    return sum(base.consultar(estado) for base in bases)
+
+
+if __name__ == "__main__":
+    # Heurísticas de todas las ciudades hacia D y de todas contra todas
+    puntos = coordenadas(ciudades)
+    print("\n📐 Euclidiana hacia D:", np.round(distancias_euclidianas(puntos, [destino.x, destino.y]), 2))
+    print("📐 Manhattan todos contra todos:\n", distancias_manhattan(puntos, puntos))
+
+    # Un millón de puntos contra una meta
+    nube = np.random.default_rng(0).uniform(0, 100, (1_000_000, 2))
+    inicio = time.perf_counter()
+    distancias_euclidianas(nube, [50, 50])
+    print(f"⚡ 1.000.000 heurísticas euclidianas en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    # PDB aditiva para el 8-puzzle con dos patrones disjuntos
+    inicio = time.perf_counter()
+    bases = [BaseDatosPatrones(3, 3, [1, 2, 3, 4]), BaseDatosPatrones(3, 3, [5, 6, 7, 8])]
+    print(f"🧩 PDBs del 8-puzzle construidas en {time.perf_counter() - inicio:.2f} s "
+          f"({sum(b.tabla.nbytes for b in bases)} bytes)")
+    estado = [8, 6, 7, 2, 5, 4, 3, 0, 1]
+    print(f"🧩 Heurística PDB de {estado}: {heuristica_pdb(estado, bases)}")
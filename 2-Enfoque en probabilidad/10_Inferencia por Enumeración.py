@@ -1,4 +1,7 @@
 import itertools
+import time
+
+import numpy as np
 
 # Definir las probabilidades condicionales para cada variable
 # Probabilidades para la lluvia (Llueve)
@@ -61,3 +64,136 @@ probabilidad_accidente = inferir_accidente(evidencia)
 
 # Mostrar el resultado
 print(f"\nProbabilidad de que ocurra un accidente dado que hay tráfico y lluvia: {probabilidad_accidente:.4f}")
+
+
+# =====================================================================
+# Red bayesiana genérica e inferencia por enumeración con memoización
+# =====================================================================
+# Cada variable tiene una lista de valores, sus padres y una CPT como array
+# con un eje por padre (en orden) y el último eje para la propia variable.
+class RedBayesiana:
+    def __init__(self):
+        self.variables = []   # En orden topológico (cada padre antes que sus hijos)
+        self.valores = {}
+        self.padres = {}
+        self.cpts = {}
+        self.cache = {}
+
+    def agregar(self, nombre, valores, padres, cpt):
+        for p in padres:
+            if p not in self.valores:
+                raise ValueError(f"El padre {p} de {nombre} debe agregarse antes")
+        cpt = np.asarray(cpt, dtype=np.float64)
+        forma = tuple(len(self.valores[p]) for p in padres) + (len(valores),)
+        if cpt.shape != forma:
+            raise ValueError(f"CPT de {nombre} con forma {cpt.shape}, se esperaba {forma}")
+        self.variables.append(nombre)
+        self.valores[nombre] = list(valores)
+        self.padres[nombre] = list(padres)
+        self.cpts[nombre] = cpt
+        self._preparar()
+
+    def _preparar(self):
+        # frontera[i]: variables anteriores a la posición i de las que dependen las
+        # CPTs de la posición i en adelante. La suma desde i solo depende de ellas.
+        posicion = {v: i for i, v in enumerate(self.variables)}
+        self.frontera = []
+        for i in range(len(self.variables) + 1):
+            resto = self.variables[i:]
+            frontera = {p for v in resto for p in self.padres[v] if posicion[p] < i}
+            self.frontera.append(sorted(frontera, key=posicion.get))
+        self.cache = {}
+
+    def _suma(self, i, asignacion, evidencia):
+        # Σ sobre las variables ocultas desde la posición i del producto de CPTs.
+        # Clave de caché: posición, valores de la frontera y evidencia restante.
+        if i == len(self.variables):
+            return 1.0
+        clave = (i,
+                 tuple(asignacion[v] for v in self.frontera[i]),
+                 tuple((v, evidencia[v]) for v in self.variables[i:] if v in evidencia))
+        if clave in self.cache:
+            return self.cache[clave]
+        var = self.variables[i]
+        cpt = self.cpts[var][tuple(asignacion[p] for p in self.padres[var])]
+        if var in evidencia:
+            asignacion[var] = evidencia[var]
+            total = cpt[evidencia[var]] * self._suma(i + 1, asignacion, evidencia)
+        else:
+            total = 0.0
+            for k in range(len(cpt)):
+                asignacion[var] = k
+                total += cpt[k] * self._suma(i + 1, asignacion, evidencia)
+        del asignacion[var]
+        self.cache[clave] = total
+        return total
+
+    def _indices(self, evidencia):
+        return {v: self.valores[v].index(x) for v, x in evidencia.items()}
+
+    def enumeracion_ask(self, X, evidencia):
+        # Distribución P(X | evidencia) como diccionario valor -> probabilidad.
+        # La caché se comparte entre consultas sobre la misma red.
+        e = self._indices(evidencia)
+        distribucion = []
+        for k in range(len(self.valores[X])):
+            e[X] = k
+            distribucion.append(self._suma(0, {}, e))
+        total = sum(distribucion)
+        return {x: p / total for x, p in zip(self.valores[X], distribucion)}
+
+    def enumeracion_ingenua(self, X, evidencia):
+        # Bucle sobre todas las combinaciones, como inferir_accidente (para comparar)
+        e = self._indices(evidencia)
+        distribucion = np.zeros(len(self.valores[X]))
+        rangos = [[e[v]] if v in e else range(len(self.valores[v])) for v in self.variables]
+        x = self.variables.index(X)
+        for combinacion in itertools.product(*rangos):
+            asignacion = dict(zip(self.variables, combinacion))
+            p = 1.0
+            for v in self.variables:
+                p *= self.cpts[v][tuple(asignacion[q] for q in self.padres[v]) + (asignacion[v],)]
+            distribucion[combinacion[x]] += p
+        distribucion /= distribucion.sum()
+        return dict(zip(self.valores[X], distribucion))
+
+
+def red_accidente():
+    # La red lluvia/tráfico/accidente expresada con CPTs en arrays
+    red = RedBayesiana()
+    red.agregar('Llueve', ['Sí', 'No'], [], [prob_lluvia['Sí'], prob_lluvia['No']])
+    red.agregar('Tráfico', ['Sí', 'No'], ['Llueve'],
+                [[prob_trafico_dado_lluvia[l]['Sí'], prob_trafico_dado_lluvia[l]['No']] for l in ['Sí', 'No']])
+    red.agregar('Accidente', ['Sí', 'No'], ['Llueve', 'Tráfico'],
+                [[[prob_accidente[(l, t)], 1 - prob_accidente[(l, t)]] for t in ['Sí', 'No']] for l in ['Sí', 'No']])
+    return red
+
+
+def red_cadena(n, semilla=0):
+    # Cadena de n variables binarias con CPTs aleatorias para el benchmark
+    rng = np.random.default_rng(semilla)
+    red = RedBayesiana()
+    red.agregar('X0', [0, 1], [], rng.dirichlet([1, 1]))
+    for i in range(1, n):
+        padres = [f'X{i - 1}'] + ([f'X{i - 2}'] if i >= 2 else [])
+        red.agregar(f'X{i}', [0, 1], padres, rng.dirichlet([1, 1], size=(2,) * len(padres)))
+    return red
+
+
+if __name__ == "__main__":
+    red = red_accidente()
+    print(f"P(Accidente | {evidencia}) = {red.enumeracion_ask('Accidente', evidencia)['Sí']:.4f}")
+    print(f"P(Accidente) = {red.enumeracion_ask('Accidente', {})['Sí']:.4f}")
+
+    print("\n⏱️ Enumeración memoizada frente al bucle sobre todas las combinaciones")
+    for n in (6, 10, 14, 16):
+        cadena = red_cadena(n)
+        e = {f'X{n - 1}': 1}
+        inicio = time.perf_counter()
+        rapida = cadena.enumeracion_ask('X0', e)
+        t_memo = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        lenta = cadena.enumeracion_ingenua('X0', e)
+        t_ingenua = time.perf_counter() - inicio
+        assert abs(rapida[1] - lenta[1]) < 1e-9
+        print(f"n={n:>2}: memoizada {t_memo * 1000:8.2f} ms | ingenua {t_ingenua * 1000:9.2f} ms")
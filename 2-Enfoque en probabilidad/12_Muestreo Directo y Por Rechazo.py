@@ -1,4 +1,7 @@
 import random  # Importamos la librería estándar 'random' para generar números aleatorios
+import time    # Para medir muestras por segundo
+import warnings  # Para avisar cuando se agota el presupuesto de muestras
+import numpy as np  # Para generar muestras en bloques grandes
 
 # --- Definimos las zonas y sus probabilidades de encontrar el tesoro --- #
 
@@ -66,3 +69,131 @@ print(resultado_directo)  # Mostramos las zonas elegidas
 print("\n🟢 Exploradores usando Muestreo por Rechazo:")
 resultado_rechazo = muestreo_por_rechazo(zonas, 15)  # Realizamos 15 búsquedas
 print(resultado_rechazo)  # Mostramos las zonas elegidas
+
+
+# --- Versión vectorizada: muestreo por bloques con NumPy --- #
+# En lugar de una llamada a random.choices / random.uniform por muestra, se
+# generan bloques grandes de muestras con operaciones sobre arrays.
+
+def muestreo_directo_vectorizado(zonas, n_busquedas, rng=None):
+    """
+    Igual que muestreo_directo pero en un solo bloque: devuelve un array de índices
+    de zona (0, 1, 2...) en el orden de zonas.keys().
+    """
+    rng = rng or np.random.default_rng()
+    probabilidades = np.array(list(zonas.values()), dtype=np.float64)
+    acumulada = np.cumsum(probabilidades / probabilidades.sum())
+    # Cada número aleatorio cae en un intervalo de la distribución acumulada
+    return np.searchsorted(acumulada, rng.random(n_busquedas), side="right")
+
+
+class RedMuestreo:
+    """
+    Red bayesiana discreta para muestreo: variables en orden topológico, cada una
+    con su CPT (un eje por padre y el último para sus valores).
+    """
+    def __init__(self):
+        self.variables = []
+        self.valores = {}
+        self.padres = {}
+        self.cpts = {}
+
+    def agregar(self, nombre, valores, padres, cpt):
+        cpt = np.asarray(cpt, dtype=np.float64)
+        self.variables.append(nombre)
+        self.valores[nombre] = list(valores)
+        self.padres[nombre] = list(padres)
+        # Guardamos la CPT como tabla 2D: una fila por combinación de padres
+        self.cpts[nombre] = cpt.reshape(-1, len(valores))
+
+    def _fila(self, nombre, muestra, vivas):
+        # Índice de fila de la CPT según los valores muestreados de los padres
+        padres = self.padres[nombre]
+        if not padres:
+            return np.zeros(vivas, dtype=np.int64)
+        dims = [len(self.valores[p]) for p in padres]
+        return np.ravel_multi_index([muestra[p] for p in padres], dims)
+
+    def muestrear_bloque(self, n, rng, evidencia=None):
+        """
+        Muestrea n filas en orden topológico. Cada variable de evidencia se comprueba
+        en cuanto se muestrea: las filas inconsistentes se descartan y las variables
+        siguientes solo se muestrean para las supervivientes.
+        """
+        evidencia = evidencia or {}
+        muestra = {}
+        vivas = n
+        for nombre in self.variables:
+            filas = self._fila(nombre, muestra, vivas)
+            tabla = self.cpts[nombre][filas]
+            if nombre in evidencia:
+                # Aceptamos con probabilidad P(evidencia | padres): equivale a muestrear y comparar
+                k = self.valores[nombre].index(evidencia[nombre])
+                aceptar = rng.random(vivas) < tabla[:, k]
+                muestra = {v: x[aceptar] for v, x in muestra.items()}
+                vivas = int(aceptar.sum())
+                muestra[nombre] = np.full(vivas, k, dtype=np.int64)
+                if vivas == 0:
+                    break
+            else:
+                u = rng.random((vivas, 1))
+                muestra[nombre] = np.minimum((np.cumsum(tabla, axis=1) < u).sum(axis=1), tabla.shape[1] - 1)
+        return muestra, vivas
+
+
+def muestreo_por_rechazo_vectorizado(red, consulta, evidencia, n_aceptadas, tam_bloque=100_000,
+                                     semilla=None, max_muestras=50_000_000):
+    """
+    Muestreo por rechazo por bloques hasta reunir n_aceptadas muestras consistentes
+    con la evidencia. Devuelve la distribución estimada de `consulta` y estadísticas.
+    Si se proponen max_muestras sin llegar a n_aceptadas (evidencia muy improbable),
+    avisa y devuelve el resultado parcial; si no se aceptó ninguna, lanza ValueError.
+    """
+    rng = np.random.default_rng(semilla)
+    conteos = np.zeros(len(red.valores[consulta]), dtype=np.int64)
+    propuestas = consistentes = aceptadas = 0
+    inicio = time.perf_counter()
+    while aceptadas < n_aceptadas:
+        if propuestas >= max_muestras:
+            if aceptadas == 0:
+                raise ValueError(f"Ninguna de {propuestas:,} muestras es consistente con {evidencia}")
+            warnings.warn(f"Presupuesto de {max_muestras:,} muestras agotado con solo "
+                          f"{aceptadas:,} de {n_aceptadas:,} aceptadas", RuntimeWarning)
+            break
+        muestra, vivas = red.muestrear_bloque(tam_bloque, rng, evidencia)
+        propuestas += tam_bloque
+        consistentes += vivas
+        if vivas == 0:
+            continue
+        utiles = muestra[consulta][:n_aceptadas - aceptadas]
+        conteos += np.bincount(utiles, minlength=len(conteos))
+        aceptadas += len(utiles)
+    tiempo = time.perf_counter() - inicio
+    distribucion = dict(zip(red.valores[consulta], conteos / conteos.sum()))
+    estadisticas = {"propuestas": propuestas, "aceptadas": aceptadas,
+                    "tasa_aceptacion": consistentes / propuestas,
+                    "muestras_efectivas_por_segundo": aceptadas / tiempo}
+    return distribucion, estadisticas
+
+
+# --- Ejecutamos las versiones vectorizadas --- #
+if __name__ == "__main__":
+    nombres_zonas = list(zonas.keys())
+
+    inicio = time.perf_counter()
+    indices = muestreo_directo_vectorizado(zonas, 1_000_000)
+    tiempo = time.perf_counter() - inicio
+    frecuencias = np.bincount(indices, minlength=len(zonas)) / len(indices)
+    print(f"\n⚡ Muestreo directo vectorizado: 1.000.000 muestras en {tiempo * 1000:.1f} ms")
+    print({z: round(float(f), 3) for z, f in zip(nombres_zonas, frecuencias)})
+
+    # El mismo escenario de rechazo como red: la zona y un camino que es seguro con prob. 0.8
+    red = RedMuestreo()
+    red.agregar("Zona", nombres_zonas, [], list(zonas.values()))
+    red.agregar("Camino", ["Seguro", "Peligroso"], [], [0.8, 0.2])
+    red.agregar("Tesoro", ["Sí", "No"], ["Zona"], [[0.7, 0.3], [0.4, 0.6], [0.2, 0.8]])
+    for evidencia in ({"Camino": "Seguro"}, {"Camino": "Seguro", "Tesoro": "Sí"}):
+        distribucion, stats = muestreo_por_rechazo_vectorizado(red, "Zona", evidencia, 500_000, semilla=0)
+        print(f"\n🟢 P(Zona | {evidencia}):", {z: round(float(p), 3) for z, p in distribucion.items()})
+        print(f"   Aceptación {stats['tasa_aceptacion']:.1%}, "
+              f"{stats['muestras_efectivas_por_segundo']:,.0f} muestras efectivas/s")
@@ -1,4 +1,6 @@
 import random
+import time
+import numpy as np
 
 # --- Definimos nuestras variables y sus probabilidades condicionales --- #
 
@@ -85,3 +87,171 @@ for animal, peso in zip(resultados, pesos):
 print("\n🟢 Resumen ponderado final:\n")
 for animal, peso_total in resumen.items():
     print(f"{animal}: {peso_total:.3f}")
+
+
+# --- Motor de ponderación de verosimilitud por lotes y en flujo --- #
+# Las muestras se generan en lotes vectorizados y los conteos ponderados se acumulan
+# sobre la marcha, de modo que se puede parar al alcanzar una precisión o un tiempo.
+# Los pesos se llevan en logaritmos: con muchas evidencias el producto de
+# probabilidades se iría a 0 en coma flotante.
+
+class RedPonderada:
+    """
+    Red bayesiana discreta en orden topológico; cada CPT tiene un eje por padre y
+    el último eje para los valores de la variable.
+    """
+    def __init__(self):
+        self.variables = []
+        self.valores = {}
+        self.padres = {}
+        self.cpts = {}
+
+    def agregar(self, nombre, valores, padres, cpt):
+        self.variables.append(nombre)
+        self.valores[nombre] = list(valores)
+        self.padres[nombre] = list(padres)
+        self.cpts[nombre] = np.asarray(cpt, dtype=np.float64).reshape(-1, len(valores))
+
+    def muestrear_lote(self, n, evidencia, rng):
+        """
+        Devuelve (muestra, log_pesos): las variables de evidencia se fijan y suman
+        log P(e | padres) al peso; el resto se muestrea de su CPT.
+        """
+        muestra = {}
+        log_pesos = np.zeros(n)
+        for nombre in self.variables:
+            padres = self.padres[nombre]
+            if padres:
+                dims = [len(self.valores[p]) for p in padres]
+                filas = np.ravel_multi_index([muestra[p] for p in padres], dims)
+            else:
+                filas = np.zeros(n, dtype=np.int64)
+            tabla = self.cpts[nombre][filas]
+            if nombre in evidencia:
+                k = self.valores[nombre].index(evidencia[nombre])
+                with np.errstate(divide="ignore"):
+                    log_pesos += np.log(tabla[:, k])
+                muestra[nombre] = np.full(n, k, dtype=np.int64)
+            else:
+                u = rng.random((n, 1))
+                muestra[nombre] = np.minimum((np.cumsum(tabla, axis=1) < u).sum(axis=1), tabla.shape[1] - 1)
+        return muestra, log_pesos
+
+
+class EstimadorPonderado:
+    """
+    Acumula P(consulta | evidencia) lote a lote. Guarda las sumas de pesos y de pesos
+    al cuadrado relativas a una referencia (el mayor log-peso visto), reescalándolas
+    cuando aparece uno mayor.
+    """
+    def __init__(self, red, consulta, evidencia, tam_lote=50_000, semilla=None):
+        self.red = red
+        self.consulta = consulta
+        self.evidencia = dict(evidencia)
+        self.tam_lote = tam_lote
+        self.rng = np.random.default_rng(semilla)
+        k = len(red.valores[consulta])
+        self.referencia = -np.inf   # log-peso máximo visto
+        self.suma = np.zeros(k)     # Σ w_i · 1[x_i = k] / exp(referencia)
+        self.suma2 = np.zeros(k)    # Σ w_i² · 1[x_i = k] / exp(2 · referencia)
+        self.n = 0
+
+    def actualizar(self):
+        """Genera un lote y lo incorpora a los acumuladores."""
+        muestra, log_pesos = self.red.muestrear_lote(self.tam_lote, self.evidencia, self.rng)
+        self.n += self.tam_lote
+        maximo = log_pesos.max()
+        if maximo == -np.inf:
+            return  # Lote sin ninguna muestra compatible con la evidencia
+        if maximo > self.referencia:
+            escala = np.exp(self.referencia - maximo)
+            self.suma *= escala
+            self.suma2 *= escala * escala
+            self.referencia = maximo
+        pesos = np.exp(log_pesos - self.referencia)
+        x = muestra[self.consulta]
+        k = len(self.suma)
+        self.suma += np.bincount(x, weights=pesos, minlength=k)
+        self.suma2 += np.bincount(x, weights=pesos * pesos, minlength=k)
+
+    def distribucion(self):
+        total = self.suma.sum()
+        return self.suma / total if total > 0 else np.full(len(self.suma), np.nan)
+
+    def tamano_efectivo(self):
+        """ESS = (Σw)² / Σw², invariante a la escala de los pesos."""
+        total2 = self.suma2.sum()
+        return self.suma.sum() ** 2 / total2 if total2 > 0 else 0.0
+
+    def intervalos(self, z=1.96):
+        """
+        Intervalo de confianza aproximado para cada valor usando la varianza del
+        estimador autonormalizado: Σ w_i² (1[x_i = k] - p_k)² / (Σw)².
+        """
+        p = self.distribucion()
+        total = self.suma.sum()
+        if total <= 0:
+            return np.full((len(p), 2), np.nan)
+        varianza = (self.suma2 * (1 - p) ** 2 + (self.suma2.sum() - self.suma2) * p ** 2) / total ** 2
+        radio = z * np.sqrt(varianza)
+        return np.stack([np.clip(p - radio, 0, 1), np.clip(p + radio, 0, 1)], axis=1)
+
+    def ejecutar(self, precision=None, tiempo_max=None, max_muestras=10_000_000, z=1.96, informe=None):
+        """
+        Genera lotes hasta que la semiamplitud de todos los intervalos sea <= precision,
+        se agote tiempo_max (segundos) o se alcance max_muestras. `informe(estimador)`
+        se llama tras cada lote para seguir el progreso.
+        """
+        inicio = time.perf_counter()
+        while self.n < max_muestras:
+            self.actualizar()
+            if informe:
+                informe(self)
+            if precision is not None and self.suma.sum() > 0:
+                ic = self.intervalos(z)
+                if np.all((ic[:, 1] - ic[:, 0]) / 2 <= precision):
+                    break
+            if tiempo_max is not None and time.perf_counter() - inicio >= tiempo_max:
+                break
+        return dict(zip(self.red.valores[self.consulta], self.distribucion()))
+
+
+def red_safari(probabilidades, caracteristicas):
+    """Convierte los diccionarios del safari en una RedPonderada Animal -> características."""
+    red = RedPonderada()
+    animales = list(probabilidades)
+    red.agregar("Animal", animales, [], [probabilidades[a] for a in animales])
+    for c in caracteristicas[animales[0]]:
+        # Valores [True, False]: la primera columna es P(característica | animal)
+        red.agregar(c, [True, False], ["Animal"],
+                    [[caracteristicas[a][c], 1 - caracteristicas[a][c]] for a in animales])
+    return red
+
+
+# --- Ejecutamos el motor por lotes --- #
+if __name__ == "__main__":
+    red = red_safari(probabilidades, caracteristicas)
+
+    def mostrar(est):
+        if est.n % 100_000 == 0:
+            print(f"  n={est.n:>8,}  ESS={est.tamano_efectivo():>10,.0f}  P={np.round(est.distribucion(), 4)}")
+
+    print("\n⚡ Ponderación por lotes (precisión objetivo ±0.002):")
+    # Con la evidencia completa (Grande y Rayado) solo la cebra es posible; observamos solo 'Grande'
+    estimador = EstimadorPonderado(red, "Animal", {'Grande': True}, tam_lote=20_000, semilla=0)
+    resultado = estimador.ejecutar(precision=0.002, tiempo_max=5.0, informe=mostrar)
+    for (animal, p), (bajo, alto) in zip(resultado.items(), estimador.intervalos()):
+        print(f"{animal}: {p:.4f}  IC95% [{bajo:.4f}, {alto:.4f}]")
+
+    # Con muchas evidencias el peso lineal se anula; en logaritmos sigue funcionando
+    cadena = RedPonderada()
+    cadena.agregar("Animal", list(probabilidades), [], list(probabilidades.values()))
+    lecturas = {}
+    for i in range(400):
+        cadena.agregar(f"Huella{i}", [True, False], ["Animal"], [[0.30, 0.70], [0.31, 0.69], [0.29, 0.71]])
+        lecturas[f"Huella{i}"] = i % 3 != 0
+    estimador = EstimadorPonderado(cadena, "Animal", lecturas, tam_lote=10_000, semilla=1)
+    resultado = estimador.ejecutar(tiempo_max=2.0, max_muestras=100_000)
+    # Peso lineal de una muestra: cerca de 0.3^133 · 0.7^267 ≈ 1e-111, y bajaría a 0 con más huellas
+    print(f"\n🐾 400 huellas observadas: ESS={estimador.tamano_efectivo():,.1f} de {estimador.n:,}")
+    print({a: round(float(p), 4) for a, p in resultado.items()})
@@ -1,4 +1,7 @@
 import random
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import matplotlib.pyplot as plt
 
 # --- Definimos nuestro "universo" de planetas y probabilidades de transición --- #
@@ -40,25 +43,247 @@ def simular_exploracion(inicio, pasos):
 
     return recorrido
 
-# --- Parámetros de simulación --- #
-inicio = 'Tierra'  # Empezamos en la Tierra
-pasos = 500        # Número de saltos
+# --- Motor MCMC: Gibbs para redes bayesianas, Metropolis-Hastings y cadenas en paralelo --- #
+# Cada proceso avanza un grupo de cadenas vectorizadas con NumPy; entre segmentos se
+# calculan R-hat y la autocorrelación y se para en cuanto las cadenas han convergido.
 
-# --- Ejecutamos la simulación --- #
-recorrido = simular_exploracion(inicio, pasos)
+class RedGibbs:
+    """
+    Red bayesiana discreta para Gibbs. Cada CPT tiene un eje por padre (en el orden dado)
+    y el último eje para la propia variable.
+    """
+    def __init__(self):
+        self.variables = []
+        self.valores = {}
+        self.padres = {}
+        self.cpts = {}
+
+    def agregar(self, nombre, valores, padres, cpt):
+        self.variables.append(nombre)
+        self.valores[nombre] = list(valores)
+        self.padres[nombre] = list(padres)
+        forma = [len(self.valores[p]) for p in padres] + [len(valores)]
+        self.cpts[nombre] = np.asarray(cpt, dtype=np.float64).reshape(forma)
+
+
+class MuestreadorGibbs:
+    """
+    Gibbs sobre las variables no observadas. La condicional de cada variable solo usa su
+    manto de Markov: su CPT y las de sus hijos, precalculadas en logaritmos.
+    """
+    def __init__(self, red, consulta, evidencia):
+        self.red = red
+        self.consulta = consulta
+        self.evidencia = {v: red.valores[v].index(x) for v, x in evidencia.items()}
+        self.libres = [v for v in red.variables if v not in self.evidencia]
+        with np.errstate(divide="ignore"):
+            factores = {v: (tuple(red.padres[v]) + (v,), np.log(red.cpts[v])) for v in red.variables}
+        self.manto = {v: [f for f in factores.values() if v in f[0]] for v in self.libres}
+        self.valores = red.valores[consulta]
+
+    def iniciar(self, n, rng):
+        """Estado inicial por muestreo hacia delante, fijando la evidencia."""
+        estado = {}
+        for v in self.red.variables:
+            if v in self.evidencia:
+                estado[v] = np.full(n, self.evidencia[v], dtype=np.int64)
+                continue
+            tabla = self.red.cpts[v][tuple(estado[p] for p in self.red.padres[v])]
+            tabla = np.broadcast_to(tabla, (n, tabla.shape[-1]))
+            u = rng.random((n, 1))
+            estado[v] = np.minimum((np.cumsum(tabla, axis=1) < u).sum(axis=1), tabla.shape[1] - 1)
+        return estado
+
+    def avanzar(self, estado, pasos, rng):
+        """Da `pasos` barridos completos; devuelve el estado y la traza (pasos, n) de la consulta."""
+        n = len(estado[self.consulta])
+        traza = np.empty((pasos, n), dtype=np.int64)
+        for t in range(pasos):
+            for v in self.libres:
+                k = len(self.red.valores[v])
+                log_p = np.zeros((n, k))
+                for variables, tabla in self.manto[v]:
+                    indice = tuple(np.arange(k)[None, :] if w == v else estado[w][:, None] for w in variables)
+                    log_p += tabla[indice]
+                p = np.exp(log_p - log_p.max(axis=1, keepdims=True))
+                acumulada = np.cumsum(p, axis=1)
+                u = rng.random((n, 1)) * acumulada[:, -1:]
+                estado[v] = np.minimum((acumulada < u).sum(axis=1), k - 1)
+            traza[t] = estado[self.consulta]
+        return estado, traza
+
+
+class ObjetivoTabla:
+    """Log-densidad no normalizada sobre los estados 0..k-1 (picklable para los procesos)."""
+    def __init__(self, pesos):
+        with np.errstate(divide="ignore"):
+            self.log_pesos = np.log(np.asarray(pesos, dtype=np.float64))
+
+    def __call__(self, x):
+        return self.log_pesos[x]
+
+
+class PropuestaUniforme:
+    """Propuesta simétrica: cualquier estado 0..k-1 con la misma probabilidad."""
+    def __init__(self, k):
+        self.k = k
+
+    def __call__(self, x, rng):
+        return rng.integers(self.k, size=len(x)), np.zeros(len(x))
+
+
+class MetropolisHastings:
+    """
+    Metropolis-Hastings vectorizado para una cadena arbitraria. `log_objetivo(x)` da la
+    log-densidad no normalizada de un array de estados y `proponer(x, rng)` devuelve
+    (x_propuesto, log q(x | x') - log q(x' | x)).
+    """
+    def __init__(self, log_objetivo, proponer, inicial, valores=None):
+        self.log_objetivo = log_objetivo
+        self.proponer = proponer
+        self.inicial = inicial
+        self.valores = valores
+
+    def iniciar(self, n, rng):
+        return np.full(n, self.inicial, dtype=np.int64)
+
+    def avanzar(self, estado, pasos, rng):
+        traza = np.empty((pasos, len(estado)), dtype=np.int64)
+        log_actual = self.log_objetivo(estado)
+        for t in range(pasos):
+            propuesta, log_q = self.proponer(estado, rng)
+            log_nuevo = self.log_objetivo(propuesta)
+            aceptar = np.log(rng.random(len(estado))) < log_nuevo - log_actual + log_q
+            estado = np.where(aceptar, propuesta, estado)
+            log_actual = np.where(aceptar, log_nuevo, log_actual)
+            traza[t] = estado
+        return estado, traza
+
+
+def autocorrelacion(traza):
+    """Autocorrelación media entre cadenas de una traza (pasos, cadenas), vía FFT."""
+    n = traza.shape[0]
+    x = traza - traza.mean(axis=0)
+    espectro = np.fft.rfft(x, n=2 * n, axis=0)
+    acf = np.fft.irfft(espectro * np.conj(espectro), axis=0)[:n]
+    varianza = acf[0]
+    acf = np.divide(acf, varianza, out=np.zeros_like(acf), where=varianza > 0)
+    return acf.mean(axis=1)
+
+
+def tamano_efectivo(traza):
+    """ESS = N·M / (1 + 2 Σ ρ_t), cortando la suma en la primera autocorrelación negativa."""
+    rho = autocorrelacion(traza)[1:]
+    negativas = np.flatnonzero(rho < 0)
+    corte = negativas[0] if len(negativas) else len(rho)
+    return traza.size / (1 + 2 * rho[:corte].sum())
+
+
+def r_hat(traza):
+    """R-hat de Gelman-Rubin partiendo cada cadena en dos mitades."""
+    n = traza.shape[0] // 2
+    mitades = np.concatenate([traza[:n], traza[n:2 * n]], axis=1)
+    medias = mitades.mean(axis=0)
+    W = mitades.var(axis=0, ddof=1).mean()
+    B = n * medias.var(ddof=1)
+    if W == 0:
+        return 1.0 if B == 0 else np.inf
+    return float(np.sqrt(((n - 1) / n * W + B / n) / W))
+
+
+def _segmento(muestreador, estado, n, pasos, semilla):
+    # Se ejecuta en un proceso: avanza un grupo de n cadenas (o lo inicia si estado es None)
+    rng = np.random.default_rng(semilla)
+    if estado is None:
+        estado = muestreador.iniciar(n, rng)
+    return muestreador.avanzar(estado, pasos, rng)
+
+
+def mcmc_paralelo(muestreador, n_cadenas=8, procesos=None, tam_segmento=500,
+                  rhat_objetivo=1.01, ess_objetivo=2000, max_pasos=50_000, semilla=None):
+    """
+    Reparte n_cadenas en grupos, uno por proceso, y las avanza por segmentos. Tras cada
+    segmento se descarta la primera mitad como calentamiento y se calculan R-hat y ESS
+    de los indicadores de cada valor; se para cuando todos cumplen los objetivos.
+    """
+    procesos = procesos or os.cpu_count()
+    grupos = [len(g) for g in np.array_split(np.arange(n_cadenas), min(procesos, n_cadenas))]
+    estados = [None] * len(grupos)
+    semillas = np.random.SeedSequence(semilla)
+    segmentos = []
+    with ProcessPoolExecutor(max_workers=len(grupos)) as pool:
+        pasos = 0
+        while True:
+            hijas = semillas.spawn(len(grupos))
+            futuros = [pool.submit(_segmento, muestreador, e, n, tam_segmento, h)
+                       for e, n, h in zip(estados, grupos, hijas)]
+            resultados = [f.result() for f in futuros]
+            estados = [r[0] for r in resultados]
+            segmentos.append(np.concatenate([r[1] for r in resultados], axis=1))
+            pasos += tam_segmento
+
+            traza = np.concatenate(segmentos)
+            traza = traza[len(traza) // 2:]  # Calentamiento: primera mitad
+            k = len(muestreador.valores)
+            indicadores = [(traza == j).astype(np.float64) for j in range(k)]
+            rhat = max(r_hat(x) for x in indicadores)
+            # Un indicador constante no aporta varianza; si todos lo son, no hay autocorrelación que medir
+            ess = min((tamano_efectivo(x) for x in indicadores if x.std() > 0), default=traza.size)
+            if (rhat <= rhat_objetivo and ess >= ess_objetivo) or pasos >= max_pasos:
+                break
+
+    conteos = np.bincount(traza.ravel(), minlength=k)
+    return {"distribucion": dict(zip(muestreador.valores, conteos / conteos.sum())),
+            "rhat": rhat, "ess": ess, "pasos": pasos, "traza": traza}
+
+if __name__ == "__main__":
+    # --- Parámetros de simulación --- #
+    inicio = 'Tierra'  # Empezamos en la Tierra
+    pasos = 500        # Número de saltos
+
+    # --- Ejecutamos la simulación --- #
+    recorrido = simular_exploracion(inicio, pasos)
+
+    # --- Analizamos cuántas veces se visitó cada planeta --- #
+    frecuencia = {planeta: recorrido.count(planeta) for planeta in planetas}
+
+    # --- Mostramos resultados --- #
+    print("🪐 Frecuencia de visitas a cada planeta:\n")
+    for planeta, veces in frecuencia.items():
+        print(f"{planeta}: {veces} veces")
 
-# --- Analizamos cuántas veces se visitó cada planeta --- #
-frecuencia = {planeta: recorrido.count(planeta) for planeta in planetas}
+    # --- MCMC en paralelo con diagnósticos --- #
+    # Metropolis-Hastings hacia la distribución estacionaria de la matriz de transiciones
+    P = np.array([[transiciones[a][b] for b in planetas] for a in planetas])
+    P /= P.sum(axis=1, keepdims=True)
+    valores, vectores = np.linalg.eig(P.T)
+    estacionaria = np.real(vectores[:, np.argmin(np.abs(valores - 1))])
+    estacionaria /= estacionaria.sum()
+    mh = MetropolisHastings(ObjetivoTabla(estacionaria), PropuestaUniforme(len(planetas)),
+                            inicial=0, valores=planetas)
+    resultado = mcmc_paralelo(mh, n_cadenas=8, semilla=0)
+    print(f"\n🔁 Metropolis-Hastings: {resultado['pasos']} pasos/cadena, "
+          f"R-hat={resultado['rhat']:.4f}, ESS={resultado['ess']:,.0f}")
+    for planeta, p, exacta in zip(planetas, resultado["distribucion"].values(), estacionaria):
+        print(f"{planeta}: {p:.3f} (estacionaria {exacta:.3f})")
 
-# --- Mostramos resultados --- #
-print("🪐 Frecuencia de visitas a cada planeta:\n")
-for planeta, veces in frecuencia.items():
-    print(f"{planeta}: {veces} veces")
+    # Gibbs sobre una red de la misión: ¿hubo tormenta solar si la nave llegó con retraso?
+    red = RedGibbs()
+    red.agregar("Tormenta", [True, False], [], [0.1, 0.9])
+    red.agregar("Fallo", [True, False], ["Tormenta"], [[0.6, 0.4], [0.05, 0.95]])
+    red.agregar("Desvío", [True, False], ["Tormenta"], [[0.7, 0.3], [0.2, 0.8]])
+    red.agregar("Retraso", [True, False], ["Fallo", "Desvío"],
+                [[[0.95, 0.05], [0.8, 0.2]], [[0.5, 0.5], [0.05, 0.95]]])
+    gibbs = MuestreadorGibbs(red, "Tormenta", {"Retraso": True})
+    resultado = mcmc_paralelo(gibbs, n_cadenas=8, semilla=1)
+    print(f"\n🎲 Gibbs: {resultado['pasos']} barridos/cadena, "
+          f"R-hat={resultado['rhat']:.4f}, ESS={resultado['ess']:,.0f}")
+    print("P(Tormenta | Retraso) ≈", {v: round(float(p), 3) for v, p in resultado["distribucion"].items()})
 
-# --- Visualizamos los resultados --- #
-plt.bar(frecuencia.keys(), frecuencia.values(), color='skyblue')
-plt.title('Frecuencia de Visitas a Planetas (MCMC)')
-plt.xlabel('Planeta')
-plt.ylabel('Número de visitas')
-plt.grid(True, linestyle='--', alpha=0.5)
-plt.show()
+    # --- Visualizamos los resultados --- #
+    plt.bar(frecuencia.keys(), frecuencia.values(), color='skyblue')
+    plt.title('Frecuencia de Visitas a Planetas (MCMC)')
+    plt.xlabel('Planeta')
+    plt.ylabel('Número de visitas')
+    plt.grid(True, linestyle='--', alpha=0.5)
+    plt.show()
@@ -2,6 +2,123 @@
 import random
 # Importamos defaultdict de collections para crear diccionarios con valores por defecto
 from collections import defaultdict
+# NumPy para evolucionar léxicos completos codificados como arrays
+import numpy as np
+
+def tabla_alias(probabilidades):
+    """
+    Construye la tabla de alias de Walker (método de Vose) para una distribución.
+
+    Args:
+        probabilidades (array): Probabilidades de los K resultados (pueden incluir ceros).
+
+    Returns:
+        tuple: (umbral, alias). Para muestrear se elige una casilla j uniforme y se
+               devuelve j si u < umbral[j], o alias[j] en otro caso.
+    """
+    p = np.asarray(probabilidades, dtype=np.float64)
+    k = len(p)
+    escalada = p * k / p.sum()
+    umbral = np.ones(k)
+    alias = np.arange(k)
+    pequenas = [i for i in range(k) if escalada[i] < 1.0]
+    grandes = [i for i in range(k) if escalada[i] >= 1.0]
+    while pequenas and grandes:
+        i, j = pequenas.pop(), grandes.pop()
+        # La casilla i se completa con masa de j
+        umbral[i] = escalada[i]
+        alias[i] = j
+        escalada[j] -= 1.0 - escalada[i]
+        (pequenas if escalada[j] < 1.0 else grandes).append(j)
+    # Lo que quede (por redondeo) se queda con umbral 1
+    return umbral, alias
+
+
+class ModeloTransicionAlias:
+    """
+    Reglas de transición compiladas a códigos de caracter y tablas de alias, para
+    evolucionar un léxico entero (array de códigos) en un solo paso vectorizado.
+    El código 0 se reserva para el relleno de las palabras más cortas.
+    """
+    def __init__(self, reglas_transicion, caracteres_inmutables, alfabeto_extra=""):
+        """
+        Args:
+            reglas_transicion (dict): Reglas {caracter: {destino: probabilidad}}.
+            caracteres_inmutables (set): Caracteres que nunca cambian.
+            alfabeto_extra (str): Caracteres adicionales del léxico sin reglas.
+        """
+        alfabeto = set(alfabeto_extra) | set(caracteres_inmutables) | set(reglas_transicion)
+        for destinos in reglas_transicion.values():
+            alfabeto |= set(destinos)
+        self.alfabeto = [""] + sorted(alfabeto)
+        self.codigo = {c: i for i, c in enumerate(self.alfabeto)}
+        # Puntos de código Unicode ordenados para codificar con searchsorted
+        self.puntos = np.array([0] + [ord(c) for c in self.alfabeto[1:]], dtype=np.uint32)
+
+        n = len(self.alfabeto)
+        k = max([len(d) for d in reglas_transicion.values()] + [1])
+        self.destinos = np.tile(np.arange(n)[:, None], (1, k))  # Por defecto, el caracter no cambia
+        self.umbral = np.ones((n, k))
+        self.alias = np.zeros((n, k), dtype=np.int64)
+        for caracter, destinos in reglas_transicion.items():
+            if caracter in caracteres_inmutables:
+                continue
+            fila = self.codigo[caracter]
+            codigos = [self.codigo[d] for d in destinos]
+            pesos = list(destinos.values()) + [0.0] * (k - len(destinos))
+            self.destinos[fila] = codigos + [codigos[0]] * (k - len(codigos))
+            self.umbral[fila], self.alias[fila] = tabla_alias(pesos)
+        self.k = k
+        # Tipos elegidos según el tamaño real: códigos para n símbolos e índices planos hasta
+        # 2·n·k (destino y alias intercalados). Con alfabetos pequeños son uint8 y uint16.
+        self.tipo_codigo = np.min_scalar_type(n - 1)
+        self._tipo_indice = np.min_scalar_type(2 * n * k)
+        # Con muchas casillas la parte fraccionaria de un float32 pierde demasiada precisión
+        self._tipo_uniforme = np.float32 if k <= 256 else np.float64
+        # Tablas planas: umbral y, por casilla, su destino y el de su alias intercalados
+        self._umbral = self.umbral.astype(self._tipo_uniforme).ravel()
+        alternativo = np.take_along_axis(self.destinos, self.alias, axis=1)
+        self._salidas = np.stack([self.destinos, alternativo], axis=-1).astype(self.tipo_codigo).ravel()
+
+    def codificar(self, palabras):
+        """Convierte una lista de palabras en un array (n_palabras, longitud_max) de códigos (tipo_codigo)."""
+        texto = np.array(palabras, dtype=str)
+        puntos = texto.view(np.uint32).reshape(len(texto), -1)
+        codigos = np.minimum(np.searchsorted(self.puntos, puntos), len(self.puntos) - 1)
+        if not np.array_equal(self.puntos[codigos], puntos):
+            raise ValueError("El léxico contiene caracteres fuera del alfabeto del modelo")
+        return codigos.astype(self.tipo_codigo)
+
+    def decodificar(self, codigos):
+        """Inverso de codificar: devuelve la lista de palabras."""
+        puntos = np.ascontiguousarray(self.puntos[codigos])
+        return puntos.view(f"<U{codigos.shape[1]}").ravel().tolist()
+
+    def evolucionar(self, codigos, rng, out=None):
+        """
+        Aplica una generación de cambios markovianos a todos los caracteres a la vez.
+
+        Args:
+            codigos (ndarray): Léxico codificado (tipo_codigo).
+            rng (Generator): Generador aleatorio de NumPy.
+            out (ndarray): Array donde escribir el resultado (opcional).
+
+        Returns:
+            ndarray: El léxico de la siguiente generación.
+        """
+        # Un solo uniforme por caracter: su parte entera elige la casilla y la
+        # fraccionaria se compara con el umbral (índices planos, tipos pequeños)
+        tipo = self._tipo_indice
+        x = rng.random(codigos.shape, dtype=self._tipo_uniforme) * self._tipo_uniforme(self.k)
+        j = np.minimum(x.astype(tipo), tipo.type(self.k - 1))  # Por si el redondeo da justo k
+        casilla = codigos.astype(tipo, copy=False) * tipo.type(self.k) + j
+        usar_alias = (x - j) >= self._umbral.take(casilla)
+        resultado = self._salidas.take(tipo.type(2) * casilla + usar_alias)
+        if out is None:
+            return resultado
+        out[...] = resultado
+        return out
+
 
 class EvolucionLenguajeMarkov:
     def __init__(self, palabra_inicial):
@@ -101,6 +218,55 @@ class EvolucionLenguajeMarkov:
             # Añadimos la nueva palabra al historial de evolución
             self.historial.append(self.palabra_actual)
 
+    def compilar(self, palabras=()):
+        """
+        Compila las reglas de transición a un ModeloTransicionAlias.
+
+        Args:
+            palabras (iterable): Léxico a evolucionar; sus caracteres sin reglas
+                                 se añaden al alfabeto como inmutables.
+
+        Returns:
+            ModeloTransicionAlias: El modelo compilado.
+        """
+        return ModeloTransicionAlias(self.reglas_transicion, self.caracteres_inmutables,
+                                     "".join(set("".join(palabras))))
+
+    def evolucionar_lexico(self, palabras, generaciones, cada=1, ruta=None, semilla=None):
+        """
+        Evoluciona un léxico completo durante varias generaciones.
+
+        El historial se guarda como un único array de códigos (generación, palabra, caracter)
+        en lugar de una lista de cadenas; si se da `ruta`, se escribe en un .npy mapeado
+        en disco para léxicos que no caben en memoria.
+
+        Args:
+            palabras (list): Palabras iniciales (se pasan a minúsculas).
+            generaciones (int): Número de generaciones a simular.
+            cada (int): Guardar una de cada `cada` generaciones en el historial.
+            ruta (str): Fichero .npy donde guardar el historial (opcional).
+            semilla (int): Semilla del generador aleatorio.
+
+        Returns:
+            tuple: (modelo, historial) con historial de forma
+                   (generaciones // cada + 1, n_palabras, longitud_max).
+        """
+        palabras = [p.lower() for p in palabras]
+        modelo = self.compilar(palabras)
+        rng = np.random.default_rng(semilla)
+        actual = modelo.codificar(palabras)
+        forma = (generaciones // cada + 1,) + actual.shape
+        if ruta:
+            historial = np.lib.format.open_memmap(ruta, mode="w+", dtype=modelo.tipo_codigo, shape=forma)
+        else:
+            historial = np.empty(forma, dtype=modelo.tipo_codigo)
+        historial[0] = actual
+        for gen in range(1, generaciones + 1):
+            actual = modelo.evolucionar(actual, rng, out=actual)
+            if gen % cada == 0:
+                historial[gen // cada] = actual
+        return modelo, historial
+
     def mostrar_historial(self):
         """Muestra el historial completo de evolución de la palabra."""
         print("\nEvolución de la palabra:")
@@ -155,4 +321,14 @@ if __name__ == "__main__":
     simulador = EvolucionLenguajeMarkov(palabra_inicial)
     
     # Ejecutamos la simulación por 12 generaciones
-    simulador.simular_evolucion(generaciones=12)
\ No newline at end of file
+    simulador.simular_evolucion(generaciones=12)
+    # Evolución de un léxico entero con tablas de alias
+    import time
+    lexico = [random.choice(palabras_ancestrales) for _ in range(1_000_000)]
+    inicio = time.perf_counter()
+    modelo, historial = simulador.evolucionar_lexico(lexico, generaciones=100, cada=10, semilla=0)
+    tiempo = time.perf_counter() - inicio
+    print(f"\n📚 {len(lexico):,} palabras x 100 generaciones en {tiempo:.2f} s "
+          f"(historial: {historial.nbytes / 1e6:.0f} MB)")
+    for g, fila in enumerate(historial[:, :3]):
+        print(f"Gen {g * 10:>3}: {modelo.decodificar(fila)}")
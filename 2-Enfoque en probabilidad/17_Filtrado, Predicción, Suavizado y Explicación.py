@@ -1,4 +1,6 @@
 import random
+from collections import deque
+import numpy as np
 
 # ----------------------------
 # Estados posibles del robot
@@ -127,6 +129,124 @@ def viterbi(observaciones):
     (prob, estado_final) = max((V[-1][s], s) for s in estados)
     return path[estado_final], prob
 
+# ----------------------------
+# Versión matricial: el HMM como matrices de NumPy
+# ----------------------------
+class HMM:
+    """
+    Modelo oculto de Markov con T[i, j] = P(X_t+1 = j | X_t = i) y
+    O[i, k] = P(e = k | X = i). Las observaciones se pasan como índices de símbolo
+    (o con codificar). Todas las operaciones aceptan una secuencia (n,) o un lote
+    de secuencias (B, n) a la vez.
+    """
+    def __init__(self, T, O, prior=None, estados=None, simbolos=None):
+        self.T = np.asarray(T, dtype=np.float64)
+        self.O = np.asarray(O, dtype=np.float64)
+        n = len(self.T)
+        self.prior = np.full(n, 1 / n) if prior is None else np.asarray(prior, dtype=np.float64)
+        self.estados = list(estados) if estados is not None else list(range(n))
+        self.simbolos = list(simbolos) if simbolos is not None else list(range(self.O.shape[1]))
+        self._potencias = {}
+
+    @classmethod
+    def desde_diccionarios(cls, estados, transiciones, sensor_model, prior=None):
+        simbolos = list(next(iter(sensor_model.values())))
+        T = [[transiciones[a][b] for b in estados] for a in estados]
+        O = [[sensor_model[a][o] for o in simbolos] for a in estados]
+        return cls(T, O, prior, estados, simbolos)
+
+    def codificar(self, observaciones):
+        return np.array([self.simbolos.index(o) for o in observaciones], dtype=np.int64)
+
+    def filtrar(self, obs):
+        """
+        Filtrado hacia delante normalizando en cada paso. Devuelve (creencias, log_verosimilitud):
+        creencias[..., t, :] = P(X_t | e_1:t) y log P(e_1:n) acumulada en logaritmos,
+        de modo que no hay subdesbordamiento con secuencias largas.
+        """
+        obs = np.asarray(obs)
+        lote = obs.ndim == 2
+        obs = np.atleast_2d(obs)
+        B, n = obs.shape
+        creencias = np.empty((B, n, len(self.T)))
+        bel = np.broadcast_to(self.prior, (B, len(self.T)))
+        log_verosimilitud = np.zeros(B)
+        for t in range(n):
+            bel = (bel @ self.T) * self.O[:, obs[:, t]].T   # Predicción y actualización con el sensor
+            total = bel.sum(axis=1, keepdims=True)
+            log_verosimilitud += np.log(total[:, 0])
+            bel = bel / total
+            creencias[:, t] = bel
+        if not lote:
+            return creencias[0], log_verosimilitud[0]
+        return creencias, log_verosimilitud
+
+    def potencia(self, k):
+        """T^k, calculada una vez por k con matrix_power (cuadrados sucesivos)."""
+        if k not in self._potencias:
+            self._potencias[k] = np.linalg.matrix_power(self.T, k)
+        return self._potencias[k]
+
+    def predecir(self, bel, k):
+        """P(X_t+k | e_1:t) = bel · T^k, para una creencia (S,) o un lote (B, S)."""
+        return np.asarray(bel) @ self.potencia(k)
+
+    def suavizar(self, obs):
+        """Suavizado completo hacia delante-atrás: P(X_t | e_1:n) para cada t."""
+        creencias, _ = self.filtrar(obs)
+        obs = np.asarray(obs)
+        lote = obs.ndim == 2
+        creencias = creencias if lote else creencias[None]
+        obs = np.atleast_2d(obs)
+        suaves = np.empty_like(creencias)
+        b = np.ones((obs.shape[0], len(self.T)))
+        for t in range(obs.shape[1] - 1, -1, -1):
+            s = creencias[:, t] * b
+            suaves[:, t] = s / s.sum(axis=1, keepdims=True)
+            b = (self.O[:, obs[:, t]].T * b) @ self.T.T   # Mensaje hacia atrás para t-1
+            b /= b.sum(axis=1, keepdims=True)
+        return suaves if lote else suaves[0]
+
+
+class SuavizadorRetardoFijo:
+    """
+    Suavizado en línea con retardo fijo d: tras recibir e_t devuelve P(X_t-d | e_1:t).
+    Solo guarda las últimas d+1 creencias filtradas y d observaciones, así que la memoria
+    es O(d) aunque el flujo de observaciones no tenga fin.
+    """
+    def __init__(self, hmm, retardo):
+        self.hmm = hmm
+        self.retardo = retardo
+        self.bel = hmm.prior.copy()
+        self.filtradas = deque(maxlen=retardo + 1)
+        self.observaciones = deque(maxlen=retardo)
+        self.t = 0
+
+    def actualizar(self, obs):
+        """Incorpora una observación (índice de símbolo). Devuelve (t - d, distribución) o None."""
+        self.bel = (self.bel @ self.hmm.T) * self.hmm.O[:, obs]
+        self.bel /= self.bel.sum()
+        self.filtradas.append(self.bel)
+        self.observaciones.append(obs)
+        self.t += 1
+        if len(self.filtradas) <= self.retardo:
+            return None
+        # Mensaje hacia atrás desde t hasta t-d+1 sobre la ventana
+        b = np.ones(len(self.bel))
+        for o in reversed(self.observaciones):
+            b = self.hmm.T @ (self.hmm.O[:, o] * b)
+            b /= b.sum()
+        s = self.filtradas[0] * b
+        return self.t - self.retardo - 1, s / s.sum()
+
+    def procesar(self, flujo):
+        """Generador sobre un flujo (posiblemente infinito) de observaciones."""
+        for obs in flujo:
+            resultado = self.actualizar(obs)
+            if resultado is not None:
+                yield resultado
+
+
 # ----------------------------
 # Ejecutamos todo
 # ----------------------------
@@ -152,3 +272,28 @@ seq, prob = viterbi(observaciones)
 print("\n🏆 Explicación (secuencia más probable):")
 print(f"Secuencia: {seq}")
 print(f"Probabilidad: {prob}")
+
+if __name__ == "__main__":
+    # ----------------------------
+    # Versión matricial
+    # ----------------------------
+    hmm = HMM.desde_diccionarios(estados, transiciones, sensor_model)
+    obs = hmm.codificar(observaciones)
+    creencias, log_verosimilitud = hmm.filtrar(obs)
+    print("\n🧮 Filtrado matricial (coincide con el de diccionarios):", np.allclose(
+        creencias, [[f[s] for s in estados] for f in filtrados]))
+    print(f"log P(observaciones) = {log_verosimilitud:.4f}")
+    print("Predicción a 2 pasos:", np.round(hmm.predecir(creencias[-1], 2), 4))
+    print("Predicción a 50 pasos:", np.round(hmm.predecir(creencias[-1], 50), 4))
+
+    # Flujo largo de un sensor: el suavizador con retardo 3 usa una ventana de 4 creencias
+    rng = np.random.default_rng(0)
+    flujo = rng.integers(len(hmm.simbolos), size=20_000)
+    suavizador = SuavizadorRetardoFijo(hmm, retardo=3)
+    ultimo = None
+    for t, dist in suavizador.procesar(iter(flujo)):
+        ultimo = (t, dist)
+    t, dist = ultimo
+    referencia = hmm.suavizar(flujo[:t + 4])[t]
+    print(f"\n⏱️ Retardo fijo en t={t}: {np.round(dist, 4)} (fuera de línea: {np.round(referencia, 4)})")
+    print(f"log P(flujo) = {hmm.filtrar(flujo)[1]:.1f}")
@@ -1,4 +1,6 @@
 import random  # Importamos random por si queremos hacer simulaciones adicionales (aunque en este código no se usa directamente).
+import math  # Para la raíz cuadrada del tamaño de bloque en el modo con puntos de control
+import numpy as np  # Para procesar lotes de secuencias como arrays
 
 # ----------------------------
 # ESTADOS POSIBLES DEL MODELO
@@ -124,6 +126,85 @@ def forward_backward(observaciones):
 
     return suaves
 
+# ----------------------------
+# VERSIÓN MATRICIAL POR LOTES
+# ----------------------------
+# Las observaciones de B secuencias se guardan como un array (B, n) de índices de síntoma
+# y cada paso de tiempo procesa todas las secuencias con una sola operación de matrices.
+# Los mensajes se reescalan en cada paso y la verosimilitud se acumula en logaritmos.
+def matrices_modelo(estados, transiciones, sensor_model):
+    # Convertimos los diccionarios en T[i, j] = P(j | i), O[i, k] = P(síntoma k | i) y la creencia inicial
+    simbolos = list(next(iter(sensor_model.values())))
+    T = np.array([[transiciones[a][b] for b in estados] for a in estados])
+    O = np.array([[sensor_model[a][o] for o in simbolos] for a in estados])
+    prior = np.full(len(estados), 1 / len(estados))
+    return T, O, prior, simbolos
+
+def forward_lote(T, O, alpha, obs, guardar=True):
+    # Avanza los mensajes forward (B, S) sobre obs (B, m); devuelve (alphas (m, B, S) o None, alpha final, log-verosimilitud)
+    m = obs.shape[1]
+    alphas = np.empty((m,) + alpha.shape) if guardar else None
+    log_verosimilitud = np.zeros(alpha.shape[0])
+    for t in range(m):
+        alpha = (alpha @ T) * O[:, obs[:, t]].T  # Predicción y evidencia del paso t
+        total = alpha.sum(axis=1, keepdims=True)
+        alpha = alpha / total  # Reescalado: evita que los mensajes tiendan a 0
+        log_verosimilitud += np.log(total[:, 0])
+        if guardar:
+            alphas[t] = alpha
+    return alphas, alpha, log_verosimilitud
+
+def backward_lote(T, O, beta, obs, alphas):
+    # Recorre el bloque hacia atrás combinando con los alphas; devuelve (suavizados (B, m, S), beta de entrada al bloque)
+    m = obs.shape[1]
+    suaves = np.empty((obs.shape[0], m, T.shape[0]))
+    for t in range(m - 1, -1, -1):
+        g = alphas[t] * beta
+        suaves[:, t] = g / g.sum(axis=1, keepdims=True)
+        beta = (O[:, obs[:, t]].T * beta) @ T.T  # Mensaje backward para el paso anterior
+        beta = beta / beta.sum(axis=1, keepdims=True)
+    return suaves, beta
+
+def forward_backward_lote(T, O, prior, obs):
+    # Suavizado de un lote de secuencias completo en memoria: O(B · n · S)
+    obs = np.atleast_2d(obs)
+    alpha = np.broadcast_to(prior, (obs.shape[0], len(prior)))
+    alphas, _, log_verosimilitud = forward_lote(T, O, alpha, obs)
+    suaves, _ = backward_lote(T, O, np.ones_like(alpha), obs, alphas)
+    return suaves, log_verosimilitud
+
+def forward_backward_checkpoint(T, O, prior, obs, tam_bloque=None, out=None, consumidor=None):
+    """
+    Suavizado con puntos de control (raíz cuadrada de memoria): la pasada forward solo
+    guarda el mensaje al inicio de cada bloque de k ≈ sqrt(n) pasos; la pasada backward
+    recalcula los alphas de un bloque cada vez desde su punto de control. La memoria de
+    trabajo es O(B · sqrt(n) · S) a cambio de hacer dos veces el forward.
+
+    Los suavizados se escriben en `out` (B, n, S) —que puede ser un memmap— y/o se pasan
+    bloque a bloque a consumidor(inicio, suaves), de atrás hacia delante. Devuelve la
+    log-verosimilitud de cada secuencia. `obs` puede ser también un memmap (B, n).
+    """
+    B, n = obs.shape
+    k = tam_bloque or max(1, math.isqrt(n))
+    inicios = list(range(0, n, k))
+    alpha = np.broadcast_to(prior, (B, len(prior)))
+    puntos = []  # alpha justo antes de cada bloque
+    log_verosimilitud = np.zeros(B)
+    for a in inicios:
+        puntos.append(alpha)
+        _, alpha, lv = forward_lote(T, O, alpha, np.asarray(obs[:, a:a + k]), guardar=False)
+        log_verosimilitud += lv
+    beta = np.ones((B, len(prior)))
+    for a, alpha in zip(reversed(inicios), reversed(puntos)):
+        bloque = np.asarray(obs[:, a:a + k])
+        alphas, _, _ = forward_lote(T, O, alpha, bloque)  # Recalculamos el bloque
+        suaves, beta = backward_lote(T, O, beta, bloque, alphas)
+        if out is not None:
+            out[:, a:a + k] = suaves
+        if consumidor is not None:
+            consumidor(a, suaves)
+    return log_verosimilitud
+
 # ----------------------------
 # EJECUTAMOS EL CÓDIGO
 # ----------------------------
@@ -148,3 +229,30 @@ for i, paso in enumerate(bwd):
 print("\n🎯 Suavizado (Combina ambos):")
 for i, paso in enumerate(suavizados):
     print(f"Tiempo {i+1}: {paso}")
+
+if __name__ == "__main__":
+    # ----------------------------
+    # VERSIÓN POR LOTES
+    # ----------------------------
+    T, O, prior, simbolos = matrices_modelo(estados, transiciones, sensor_model)
+    obs = np.array([[simbolos.index(o) for o in observaciones]])
+    suaves, log_verosimilitud = forward_backward_lote(T, O, prior, obs)
+    print("\n🧮 Por lotes (coincide con la versión de diccionarios):",
+          np.allclose(suaves[0], [[p[s] for s in estados] for p in suavizados]))
+
+    # Muchas secuencias largas: el modo con puntos de control da lo mismo con mucha menos memoria.
+    # La comparación con el modo completo usa un lote modesto para no reservar cientos de MB
+    rng = np.random.default_rng(0)
+    lote = rng.integers(len(simbolos), size=(200, 1_000))
+    completo, lv_completo = forward_backward_lote(T, O, prior, lote)
+    dias_enfermo = np.zeros(lote.shape[0])
+    def acumular(inicio, bloque):
+        # Ejemplo de consumidor: días esperados de enfermedad por paciente, sin guardar todos los suavizados
+        dias_enfermo[:] += bloque[:, :, 1].sum(axis=1)
+    lv = forward_backward_checkpoint(T, O, prior, lote, consumidor=acumular)
+    print(f"Puntos de control: log-verosimilitud igual {np.allclose(lv, lv_completo)}, "
+          f"días enfermo esperados iguales {np.allclose(dias_enfermo, completo[:, :, 1].sum(axis=1))}")
+    # Memoria de trabajo para un lote grande (2000 secuencias de 5000 pasos), sin llegar a reservarla
+    B, N = 2_000, 5_000
+    print(f"Memoria de trabajo con {B}×{N}: {N * B * 2 * 8 / 1e6:.0f} MB de alphas completos "
+          f"frente a ~{2 * math.isqrt(N) * B * 2 * 8 / 1e6:.1f} MB por bloque y puntos de control")
@@ -1,4 +1,6 @@
 import random  # Importamos random, aunque en este código no se usa (pero podrías usarlo para generar observaciones aleatorias)
+import time  # Para medir cuántas secuencias por segundo decodificamos
+import numpy as np  # Para Viterbi en logaritmos sobre arrays
 
 # ---------------------------------------------
 # 🔒 Estados ocultos (Lo que no podemos ver directamente)
@@ -95,6 +97,211 @@ def viterbi(observaciones):
     # Devolvemos el camino (secuencia de estados) y su probabilidad
     return path[estado_final], prob_final
 
+# ---------------------------------------------
+# 📐 Viterbi en logaritmos (max-plus) sobre arrays
+# Multiplicar probabilidades se convierte en sumar logaritmos, así que las
+# secuencias largas no se van a 0. Las observaciones son índices (B, n):
+# B secuencias de n pasos que se decodifican a la vez.
+# ---------------------------------------------
+def matrices_log(estados, observaciones_posibles, transiciones, emisiones, inicial):
+    # Pasamos los diccionarios a log T[i, j], log O[i, k] y log pi[i] (log 0 = -inf)
+    with np.errstate(divide="ignore"):
+        log_T = np.log([[transiciones[a][b] for b in estados] for a in estados])
+        log_O = np.log([[emisiones[a][o] for o in observaciones_posibles] for a in estados])
+        log_pi = np.log([inicial[a] for a in estados])
+    return log_T, log_O, log_pi
+
+def viterbi_log(log_T, log_O, log_pi, obs, tam_lote=256):
+    # Viterbi denso por lotes: delta[b, j] = max_i (delta[b, i] + log T[i, j]) + log O[j, o_t].
+    # Devuelve (caminos (B, n) de índices de estado, log-probabilidad de cada camino)
+    obs = np.atleast_2d(obs)
+    B, n = obs.shape
+    caminos = np.empty((B, n), dtype=np.int64)
+    log_probs = np.empty(B)
+    for a in range(0, B, tam_lote):  # Por trozos: el cubo (lote, S, S) acota la memoria
+        o = obs[a:a + tam_lote]
+        delta = log_pi + log_O[:, o[:, 0]].T
+        punteros = np.empty((n,) + delta.shape, dtype=np.int32)
+        for t in range(1, n):
+            candidatos = delta[:, :, None] + log_T  # (lote, anterior, actual)
+            punteros[t] = candidatos.argmax(axis=1)
+            delta = np.take_along_axis(candidatos, punteros[t][:, None, :], axis=1)[:, 0] + log_O[:, o[:, t]].T
+        estado = delta.argmax(axis=1)
+        log_probs[a:a + tam_lote] = delta[np.arange(len(o)), estado]
+        for t in range(n - 1, -1, -1):  # Reconstruimos el camino hacia atrás
+            caminos[a:a + tam_lote, t] = estado
+            estado = punteros[t][np.arange(len(o)), estado]
+    return caminos, log_probs
+
+class ViterbiDisperso:
+    """
+    Viterbi en logaritmos para espacios de decenas de miles de estados con transiciones
+    dispersas (lista de aristas origen -> destino). Sin poda, el max-plus se hace sobre
+    las aristas entrantes de cada estado; con poda por haz solo se expanden las aristas
+    salientes de los estados que siguen activos en cada secuencia.
+    """
+    def __init__(self, origen, destino, prob, log_O, log_pi):
+        origen, destino = np.asarray(origen), np.asarray(destino)
+        log_p = np.log(np.asarray(prob, dtype=np.float64))
+        self.n_estados = len(log_pi)
+        estados = np.arange(self.n_estados + 1)
+        # CSR por origen (aristas salientes contiguas) para la versión con haz
+        orden = np.argsort(origen, kind="stable")
+        self.inicio = np.searchsorted(origen[orden], estados)
+        self.destino = destino[orden]
+        self.log_p = log_p[orden]
+        # CSR por destino (aristas entrantes contiguas) para la versión exacta
+        orden = np.argsort(destino, kind="stable")
+        self.inicio_entrada = np.searchsorted(destino[orden], estados)
+        self.origen_entrada = origen[orden]
+        self.log_p_entrada = log_p[orden]
+        self.log_O = np.asarray(log_O)
+        self.log_O_T = np.ascontiguousarray(self.log_O.T)  # Fila por símbolo: lectura contigua
+        self.log_pi = np.asarray(log_pi)
+
+    def _paso_exacto(self, delta):
+        # delta (B, S) -> (mejor puntuación (B, S), estado anterior que la da (B, S))
+        E = len(self.origen_entrada)
+        candidatos = np.full((len(delta), E + 1), -np.inf)  # Columna centinela -inf al final
+        candidatos[:, :E] = delta[:, self.origen_entrada] + self.log_p_entrada  # (B, aristas)
+        tramos = self.inicio_entrada[:-1]
+        sin_entrada = self.inicio_entrada[1:] == tramos
+        # Los estados finales sin aristas entrantes empiezan en E y caen en la centinela; los
+        # demás tramos vacíos devuelven el primer elemento del siguiente y se anulan después
+        mejor = np.maximum.reduceat(candidatos, tramos, axis=1)
+        mejor[:, sin_entrada] = -np.inf
+        # Primera arista de cada tramo que alcanza el máximo (la centinela vale E y nunca gana)
+        destino_arista = np.repeat(np.arange(self.n_estados), np.diff(self.inicio_entrada))
+        posicion = np.full(candidatos.shape, E)
+        posicion[:, :E] = np.where(candidatos[:, :E] == mejor[:, destino_arista], np.arange(E), E)
+        arista = np.minimum.reduceat(posicion, tramos, axis=1)
+        arista[:, sin_entrada] = 0  # Sin predecesor: su puntuación es -inf y el puntero no se usa
+        return mejor, self.origen_entrada[np.minimum(arista, E - 1)]
+
+    def _podar(self, seq, score, haz, margen):
+        # Mantiene por secuencia los `haz` mejores estados y los que están a menos de `margen` del mejor.
+        # seq viene ordenado, así que cada secuencia es un tramo contiguo que se vuelca a una fila
+        # de una matriz (B, máximo de activos) y el umbral del haz sale de np.partition, sin ordenar.
+        if len(seq) == 0:
+            return np.empty(0, dtype=np.int64)  # Todas las secuencias ya son imposibles
+        cuantos = np.bincount(seq)
+        posicion = np.arange(len(seq)) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+        tabla = np.full((len(cuantos), cuantos.max()), -np.inf)
+        tabla[seq, posicion] = score
+        umbral = np.full(len(cuantos), -np.inf)
+        if margen is not None:
+            umbral = np.maximum(umbral, tabla.max(axis=1) - margen)
+        if haz is not None and tabla.shape[1] > haz:
+            umbral = np.maximum(umbral, -np.partition(-tabla, haz - 1, axis=1)[:, haz - 1])
+        return np.flatnonzero(np.isfinite(score) & (score >= umbral[seq]))
+
+    def decodificar(self, obs, haz=None, margen=None):
+        """
+        Decodifica un lote de observaciones (B, n). haz: máximo de estados activos por
+        secuencia; margen: poda los estados con log-probabilidad peor que la mejor menos margen.
+        Sin haz ni margen el resultado es el Viterbi exacto.
+        """
+        obs = np.atleast_2d(obs)
+        if haz is None and margen is None:
+            return self._decodificar_exacto(obs)
+        B, n = obs.shape
+        S = self.n_estados
+        # Estado activo = (secuencia, estado, puntuación), ordenado por (secuencia, estado)
+        seq = np.repeat(np.arange(B), S)
+        est = np.tile(np.arange(S), B)
+        score = self.log_pi[est] + self.log_O[est, obs[seq, 0]]
+        vivos = self._podar(seq, score, haz, margen)
+        seq, est, score = seq[vivos], est[vivos], score[vivos]
+        historia = [(est, None)]
+        mejor = np.full(B * S, -np.inf)
+        ganador = np.full(B * S, np.iinfo(np.int64).max)
+        for t in range(1, n):
+            # Expandimos las aristas salientes de todos los estados activos a la vez
+            cuantas = self.inicio[est + 1] - self.inicio[est]
+            padre = np.repeat(np.arange(len(est)), cuantas)
+            desplazamiento = np.arange(len(padre)) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+            arista = self.inicio[est][padre] + desplazamiento
+            nuevo = self.destino[arista]
+            s_padre = seq[padre]
+            # Max-plus: para cada (secuencia, destino) nos quedamos con el mejor candidato.
+            # Se acumula en un buffer plano (B · S) para obtener las claves ya ordenadas sin sort
+            clave = s_padre * S + nuevo
+            emision = self.log_O_T[obs[:, t]].ravel()  # log O[:, o_t] de cada secuencia, plano (B · S)
+            candidato = score[padre] + self.log_p[arista] + emision[clave]
+            np.maximum.at(mejor, clave, candidato)
+            gana = np.flatnonzero(candidato == mejor[clave])
+            np.minimum.at(ganador, clave[gana], gana)  # En empates, la primera arista que alcanza el máximo
+            activas = np.flatnonzero(mejor > -np.inf)
+            seq, est, score, padre = activas // S, activas % S, mejor[activas], padre[ganador[activas]]
+            mejor[activas] = -np.inf  # Dejamos los buffers limpios para el siguiente paso
+            ganador[activas] = np.iinfo(np.int64).max
+            vivos = self._podar(seq, score, haz, margen)
+            seq, est, score, padre = seq[vivos], est[vivos], score[vivos], padre[vivos]
+            historia.append((est, padre))
+        # Mejor estado final de cada secuencia y vuelta atrás por los punteros
+        # (las secuencias sin ningún estado vivo se quedan con camino -1 y log p = -inf)
+        orden = np.lexsort((-score, seq))
+        nueva = np.ones(len(orden), dtype=bool)
+        nueva[1:] = seq[orden][1:] != seq[orden][:-1]
+        primero = orden[nueva]
+        caminos = np.full((B, n), -1, dtype=np.int64)
+        log_probs = np.full(B, -np.inf)
+        log_probs[seq[primero]] = score[primero]
+        indice = primero
+        filas = seq[primero]
+        for t in range(n - 1, -1, -1):
+            estados_t, padres_t = historia[t]
+            caminos[filas, t] = estados_t[indice]
+            if padres_t is not None:
+                indice = padres_t[indice]
+        return caminos, log_probs
+
+    def _decodificar_exacto(self, obs):
+        B, n = obs.shape
+        delta = self.log_pi + self.log_O_T[obs[:, 0]]
+        punteros = np.empty((n, B, self.n_estados), dtype=np.int32)
+        for t in range(1, n):
+            delta, punteros[t] = self._paso_exacto(delta)
+            delta += self.log_O_T[obs[:, t]]
+        estado = delta.argmax(axis=1)
+        filas = np.arange(B)
+        log_probs = delta[filas, estado]
+        caminos = np.empty((B, n), dtype=np.int64)
+        for t in range(n - 1, -1, -1):
+            caminos[:, t] = estado
+            estado = punteros[t][filas, estado]
+        return caminos, log_probs
+
+def comprobar_viterbi_disperso(n_modelos=30, semilla=0):
+    # Compara ViterbiDisperso (exacto y con haz completo) con viterbi_log en modelos dispersos
+    # pequeños y aleatorios, con estados sin aristas entrantes. Devuelve cuántos no coinciden.
+    rng = np.random.default_rng(semilla)
+    fallos = 0
+    for _ in range(n_modelos):
+        S, M = rng.integers(2, 12), rng.integers(1, 4)
+        T = rng.random((S, S)) * (rng.random((S, S)) < 0.4)
+        T[:, rng.random(S) < 0.3] = 0      # Algunos estados no son alcanzables
+        T[T.sum(axis=1) == 0, 0] = 1.0     # Cada estado tiene al menos una salida
+        T /= T.sum(axis=1, keepdims=True)
+        O = rng.dirichlet(np.ones(M), size=S)
+        pi = rng.dirichlet(np.ones(S))
+        obs = rng.integers(M, size=(4, 15))
+        with np.errstate(divide="ignore"):
+            densa = viterbi_log(np.log(T), np.log(O), np.log(pi), obs)[1]
+        i, j = np.nonzero(T)
+        dispersa = ViterbiDisperso(i, j, T[i, j], np.log(O), np.log(pi))
+        if not (np.allclose(dispersa.decodificar(obs)[1], densa)
+                and np.allclose(dispersa.decodificar(obs, haz=S)[1], densa)):
+            fallos += 1
+    return fallos
+
+def medir_rendimiento(decodificar, obs, **opciones):
+    # Ejecuta un decodificador y devuelve (resultado, secuencias por segundo, pasos por segundo)
+    inicio = time.perf_counter()
+    resultado = decodificar(obs, **opciones)
+    tiempo = time.perf_counter() - inicio
+    return resultado, obs.shape[0] / tiempo, obs.size / tiempo
+
 # ---------------------------------------------
 # 🎲 Secuencia de observaciones (simuladas)
 # Lo que el detective recibe como pistas externas
@@ -116,3 +323,51 @@ print(camino_mas_probable)
 
 # Mostramos la probabilidad total de este camino (qué tan seguro está el algoritmo)
 print(f"\n🎯 Probabilidad total del camino: {probabilidad:.5f}")
+
+if __name__ == "__main__":
+    # ---------------------------------------------
+    # 📐 Versión en logaritmos y por lotes
+    # ---------------------------------------------
+    log_T, log_O, log_pi = matrices_log(estados, observaciones_posibles, transiciones, emisiones, inicial)
+    obs = np.array([[observaciones_posibles.index(o) for o in observaciones]])
+    caminos, log_probs = viterbi_log(log_T, log_O, log_pi, obs)
+    print("\n📐 Viterbi en logaritmos:", [estados[i] for i in caminos[0]], f"p = {np.exp(log_probs[0]):.5f}")
+
+    # Secuencias largas: la versión con productos se va a 0, la de logaritmos no
+    rng = np.random.default_rng(0)
+    largas = rng.integers(len(observaciones_posibles), size=(1_000, 2_000))
+    (caminos, log_probs), por_seg, pasos_seg = medir_rendimiento(
+        lambda o: viterbi_log(log_T, log_O, log_pi, o), largas)
+    print(f"Denso: {por_seg:,.0f} secuencias/s ({pasos_seg:,.0f} pasos/s), log p media {log_probs.mean():.1f}")
+
+    # Comprobación: el decodificador disperso coincide con el denso en modelos aleatorios
+    fallos = comprobar_viterbi_disperso(30)
+    print("\n✅ Viterbi disperso coincide con el denso en 30 modelos aleatorios" if fallos == 0
+          else f"\n❌ Viterbi disperso difiere del denso en {fallos} de 30 modelos")
+
+    # Espacio grande y disperso: 20.000 estados con 8 transiciones salientes cada uno
+    S, K, M = 20_000, 8, 256
+    origen = np.repeat(np.arange(S), K)
+    destino = (origen + rng.integers(-50, 50, size=S * K)) % S
+    prob = rng.dirichlet(np.ones(K), size=S).ravel()
+    with np.errstate(divide="ignore"):
+        log_O_grande = np.log(rng.dirichlet(np.full(M, 0.05), size=S))
+    log_pi_grande = np.full(S, -np.log(S))
+    modelo = ViterbiDisperso(origen, destino, prob, log_O_grande, log_pi_grande)
+    # Generamos 20 secuencias de 100 pasos muestreando el propio modelo
+    B, n = 20, 100
+    acum_T = np.cumsum(prob.reshape(S, K), axis=1)
+    acum_O = np.cumsum(np.exp(log_O_grande), axis=1)
+    estado = rng.integers(S, size=B)
+    secuencias = np.empty((B, n), dtype=np.int64)
+    for t in range(n):
+        secuencias[:, t] = np.minimum((acum_O[estado] < rng.random((B, 1))).sum(axis=1), M - 1)
+        k = np.minimum((acum_T[estado] < rng.random((B, 1))).sum(axis=1), K - 1)
+        estado = destino[estado * K + k]
+    (_, exacto), por_seg, pasos_seg = medir_rendimiento(modelo.decodificar, secuencias)
+    print(f"\n🕸️ Disperso exacto: {por_seg:,.1f} secuencias/s ({pasos_seg:,.0f} pasos/s)")
+    for haz in (2_000, 200):
+        (_, podado), por_seg, pasos_seg = medir_rendimiento(modelo.decodificar, secuencias, haz=haz)
+        print(f"Haz {haz}: {por_seg:,.1f} secuencias/s ({pasos_seg:,.0f} pasos/s), "
+              f"caminos óptimos {np.mean(np.isclose(podado, exacto)):.0%}, "
+              f"pérdida media de log p {np.mean(exacto - podado):.2f}")
@@ -1,5 +1,6 @@
 import numpy as np  # Importamos numpy para trabajar con matrices y álgebra lineal
 import matplotlib.pyplot as plt  # Importamos matplotlib para graficar resultados
+import time  # Para medir el rendimiento con muchos objetos
 
 # ---------------------------------------------
 # 🚗 Simulación: Auto en movimiento
@@ -93,6 +94,105 @@ for z in mediciones:  # Para cada medición (ruidosa)
     # Guardamos la estimación de la posición del auto
     estimaciones.append(x[0, 0])  # Solo nos interesa la posición, que es x[0, 0]
 
+# ---------------------------------------------
+# 🧮 Filtro de Kalman para muchos objetos a la vez
+# El estado de N objetos se guarda como arrays apilados: x (N, n) y P (N, n, n).
+# Predicción y corrección son llamadas a matmul/einsum/solve para todos los objetos.
+# ---------------------------------------------
+class KalmanFilter:
+    """
+    Filtro de Kalman lineal para N objetos con el mismo modelo (F, H, Q, R).
+    Las mediciones que faltan se marcan con NaN en z: esos objetos solo predicen.
+    """
+    def __init__(self, F, H, Q, R, x0, P0, B=None):
+        self.F = np.asarray(F, dtype=np.float64)
+        self.H = np.asarray(H, dtype=np.float64)
+        self.Q = np.asarray(Q, dtype=np.float64)
+        self.R = np.asarray(R, dtype=np.float64)
+        self.B = None if B is None else np.asarray(B, dtype=np.float64)
+        self.x = np.array(x0, dtype=np.float64)  # (N, n)
+        n = self.x.shape[1]
+        self.P = np.array(np.broadcast_to(P0, (len(self.x), n, n)), dtype=np.float64)  # (N, n, n)
+
+    def predecir(self, u=None):
+        # x = F x (+ B u) y P = F P F^T + Q para todos los objetos
+        self.x = np.einsum('ij,nj->ni', self.F, self.x)
+        if u is not None:
+            self.x += np.einsum('ij,nj->ni', self.B, np.atleast_2d(u))
+        self.P = self.F @ self.P @ self.F.T + self.Q  # matmul difunde sobre el eje de objetos
+        return self.x, self.P
+
+    def corregir(self, z):
+        """
+        Corrige con las mediciones z (N, m); las filas con algún NaN se consideran
+        ausentes. La ganancia se obtiene resolviendo S K^T = H P (sin invertir S) y la
+        covarianza se actualiza en forma de Joseph, que la mantiene simétrica y definida positiva.
+        """
+        z = np.asarray(z, dtype=np.float64).reshape(len(self.x), -1)
+        presentes = np.flatnonzero(~np.isnan(z).any(axis=1))
+        if len(presentes) == 0:
+            return self.x, self.P
+        x, P = self.x[presentes], self.P[presentes]
+        HP = self.H @ P                                               # (k, m, n)
+        S = HP @ self.H.T + self.R                                    # (k, m, m)
+        K = np.linalg.solve(S, HP).transpose(0, 2, 1)                 # (k, n, m); P y S simétricas
+        y = z[presentes] - np.einsum('ij,nj->ni', self.H, x)          # Innovación
+        self.x[presentes] = x + np.einsum('nij,nj->ni', K, y)
+        A = np.eye(len(self.F)) - K @ self.H                          # I - K H
+        self.P[presentes] = A @ P @ A.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+        return self.x, self.P
+
+    def filtrar(self, Z):
+        """
+        Recorre mediciones Z (T, N, m) con predicción y corrección en cada paso. Devuelve
+        (x filtrados, P filtrados, x predichos, P predichos), cada uno con eje de tiempo delante.
+        """
+        T, N = Z.shape[:2]
+        n = self.x.shape[1]
+        xs_f, xs_p = np.empty((T, N, n)), np.empty((T, N, n))
+        Ps_f, Ps_p = np.empty((T, N, n, n)), np.empty((T, N, n, n))
+        for t in range(T):
+            xs_p[t], Ps_p[t] = self.predecir()
+            xs_f[t], Ps_f[t] = self.corregir(Z[t])
+        return xs_f, Ps_f, xs_p, Ps_p
+
+    def suavizar(self, Z):
+        """
+        Suavizador de Rauch-Tung-Striebel para un lote fuera de línea: filtra hacia delante
+        y corrige hacia atrás con C = P_f F^T P_p(t+1)^-1, calculada con solve.
+        Devuelve (x suavizados (T, N, n), P suavizados (T, N, n, n)).
+        """
+        xs_f, Ps_f, xs_p, Ps_p = self.filtrar(Z)
+        xs, Ps = xs_f.copy(), Ps_f.copy()
+        for t in range(len(Z) - 2, -1, -1):
+            FP = self.F @ Ps_f[t]
+            C = np.linalg.solve(Ps_p[t + 1], FP).transpose(0, 2, 1)  # Ganancia del suavizador
+            xs[t] = xs_f[t] + np.einsum('nij,nj->ni', C, xs[t + 1] - xs_p[t + 1])
+            Ps[t] = Ps_f[t] + C @ (Ps[t + 1] - Ps_p[t + 1]) @ C.transpose(0, 2, 1)
+        return xs, Ps
+
+# El mismo auto con la clase nueva: da las mismas estimaciones y además el suavizado
+kf = KalmanFilter(F, H, Q, R, x0=np.zeros((1, 2)), P0=np.diag([1000.0, 1000.0]))
+xs_f, _, _, _ = kf.filtrar(mediciones[:, None, None])
+print("🧮 KalmanFilter coincide con el ciclo original:", np.allclose(xs_f[:, 0, 0], estimaciones))
+kf = KalmanFilter(F, H, Q, R, x0=np.zeros((1, 2)), P0=np.diag([1000.0, 1000.0]))
+suavizadas = kf.suavizar(mediciones[:, None, None])[0][:, 0, 0]
+
+# La demostración con muchos autos solo se ejecuta como script
+if __name__ == "__main__":
+    # 50.000 autos con velocidades distintas y un 20% de mediciones perdidas
+    N = 50_000
+    velocidades = np.random.uniform(-5, 5, size=N)
+    reales = tiempos[:, None] * velocidades                               # (T, N)
+    Z = (reales + np.random.normal(0, 2, size=reales.shape))[:, :, None]  # (T, N, 1)
+    Z[np.random.random(Z.shape[:2]) < 0.2] = np.nan
+    muchos = KalmanFilter(F, H, Q, R, x0=np.zeros((N, 2)), P0=np.diag([1000.0, 1000.0]))
+    inicio = time.perf_counter()
+    xs_s, _ = muchos.suavizar(Z)
+    tiempo = time.perf_counter() - inicio
+    print(f"🚗 {N:,} autos x {len(tiempos)} pasos filtrados y suavizados en {tiempo:.2f} s")
+    print(f"Error medio de velocidad al final: {np.abs(xs_s[-1, :, 1] - velocidades).mean():.3f} m/s")
+
 # ---------------------------------------------
 # 🎨 Visualización
 # ---------------------------------------------
@@ -108,6 +208,9 @@ plt.scatter(tiempos, mediciones, label='📡 Mediciones (con ruido)', color='r',
 # Graficamos las estimaciones de la posición usando el filtro de Kalman
 plt.plot(tiempos, estimaciones, label='🎯 Estimación por Kalman', color='b', linestyle='--', linewidth=2)
 
+# Graficamos la estimación suavizada (RTS), que usa también las mediciones posteriores
+plt.plot(tiempos, suavizadas, label='🧵 Suavizado RTS', color='m', linestyle=':', linewidth=2)
+
 # Añadimos etiquetas y título
 plt.xlabel('Tiempo (s)')  # Eje x es el tiempo en segundos
 plt.ylabel('Posición (m)')  # Eje y es la posición en metros
@@ -1,4 +1,9 @@
+import json
 import random
+import string
+import time
+
+import numpy as np
 
 # -------------------------------------
 # Contexto:
@@ -78,3 +83,223 @@ print(f"✅ Realmente enfermo: {'Sí' if enfermo else 'No'}")
 # Este código simula la observación de síntomas y luego, usando probabilidades,
 # calcula la probabilidad "inteligente" del diagnóstico.
 # -------------------------------------
+
+
+# -------------------------------------
+# Árbol de uniones (junction tree) para consultas repetidas
+# -------------------------------------
+# Si la misma red se consulta miles de veces con distinta evidencia, conviene
+# compilarla una vez:
+#   1. Moralizar (unir padres entre sí) y triangular con min-fill
+#   2. Formar el árbol de cliques (árbol de expansión máxima por separadores)
+#   3. Asignar cada CPT a una clique que contenga su familia
+# Las consultas usan paso de mensajes de Shafer-Shenoy: una pasada de
+# recolección y otra de distribución dan TODAS las marginales. Si solo cambia
+# una variable de evidencia, basta redistribuir desde la clique que la aloja.
+
+def _einsum_nombrado(operandos, salida):
+    # operandos: lista de (variables, array); devuelve el array con ejes `salida`
+    letras = {}
+    for variables, _ in operandos:
+        for v in variables:
+            letras.setdefault(v, string.ascii_letters[len(letras)])
+    expresion = ",".join("".join(letras[v] for v in vs) for vs, _ in operandos)
+    expresion += "->" + "".join(letras[v] for v in salida)
+    return np.einsum(expresion, *[a for _, a in operandos], optimize=True)
+
+
+class ArbolUniones:
+    def __init__(self, valores, cliques, aristas, potenciales, anfitrion):
+        self.valores = valores                      # variable -> lista de valores
+        self.cliques = [tuple(c) for c in cliques]  # variables de cada clique
+        self.potenciales = potenciales              # array por clique (producto de sus CPTs)
+        self.anfitrion = anfitrion                  # variable -> clique que recibe su evidencia
+        self.vecinos = {i: [] for i in range(len(self.cliques))}
+        for i, j in aristas:
+            self.vecinos[i].append(j)
+            self.vecinos[j].append(i)
+        self.aristas = [tuple(a) for a in aristas]
+        self.evidencia = {}
+        self.mensajes = {}
+        self.mensajes_calculados = 0
+
+    @classmethod
+    def compilar(cls, valores, padres, cpts):
+        # valores/padres/cpts: diccionarios por variable; cpt con un eje por padre y el último propio
+        variables = list(valores)
+        vecinos = {v: set() for v in variables}
+        for v in variables:
+            familia = padres[v] + [v]
+            for a in familia:
+                vecinos[a].update(u for u in familia if u != a)
+
+        # Triangulación por eliminación min-fill; cada eliminación produce una clique
+        grafo = {v: set(n) for v, n in vecinos.items()}
+        cliques = []
+        while grafo:
+            def relleno(v):
+                n = list(grafo[v])
+                return sum(1 for i in range(len(n)) for j in range(i + 1, len(n)) if n[j] not in grafo[n[i]])
+            v = min(sorted(grafo), key=lambda u: (relleno(u), len(grafo[u])))
+            clique = frozenset(grafo[v] | {v})
+            if not any(clique <= c for c in cliques):
+                cliques.append(clique)
+            for a in grafo[v]:
+                grafo[a].update(u for u in grafo[v] if u != a)
+                grafo[a].discard(v)
+            del grafo[v]
+        cliques = [c for c in cliques if not any(c < d for d in cliques)]
+
+        # Árbol de expansión máxima sobre el tamaño de los separadores (Kruskal)
+        candidatas = sorted(((len(cliques[i] & cliques[j]), i, j)
+                             for i in range(len(cliques)) for j in range(i + 1, len(cliques))), reverse=True)
+        componente = list(range(len(cliques)))
+        def raiz(i):
+            while componente[i] != i:
+                componente[i] = componente[componente[i]]
+                i = componente[i]
+            return i
+        aristas = []
+        for _, i, j in candidatas:
+            if raiz(i) != raiz(j):
+                componente[raiz(i)] = raiz(j)
+                aristas.append((i, j))
+
+        # Potenciales: producto de las CPTs asignadas a cada clique
+        cliques = [tuple(sorted(c, key=variables.index)) for c in cliques]
+        factores = {i: [] for i in range(len(cliques))}
+        for v in variables:
+            familia = set(padres[v] + [v])
+            i = min((k for k, c in enumerate(cliques) if familia <= set(c)), key=lambda k: len(cliques[k]))
+            factores[i].append((tuple(padres[v]) + (v,), np.asarray(cpts[v], dtype=np.float64)))
+        potenciales = []
+        for i, c in enumerate(cliques):
+            unos = [((v,), np.ones(len(valores[v]))) for v in c]
+            potenciales.append(_einsum_nombrado(unos + factores[i], c))
+        anfitrion = {v: min((k for k, c in enumerate(cliques) if v in c), key=lambda k: len(cliques[k]))
+                     for v in variables}
+        return cls({v: list(valores[v]) for v in variables}, cliques, aristas, potenciales, anfitrion)
+
+    def guardar(self, ruta):
+        # Estructura en JSON dentro del .npz y un array por potencial (sin pickle)
+        estructura = {"valores": self.valores, "cliques": self.cliques,
+                      "aristas": self.aristas, "anfitrion": self.anfitrion}
+        np.savez(ruta, estructura=np.array(json.dumps(estructura)),
+                 **{f"potencial_{i}": p for i, p in enumerate(self.potenciales)})
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            e = json.loads(str(datos["estructura"]))
+            potenciales = [datos[f"potencial_{i}"] for i in range(len(e["cliques"]))]
+        return cls(e["valores"], e["cliques"], e["aristas"], potenciales, e["anfitrion"])
+
+    def _potencial_con_evidencia(self, i):
+        operandos = [(self.cliques[i], self.potenciales[i])]
+        for v, x in self.evidencia.items():
+            if self.anfitrion[v] == i:
+                indicador = np.zeros(len(self.valores[v]))
+                indicador[self.valores[v].index(x)] = 1.0
+                operandos.append(((v,), indicador))
+        return operandos
+
+    def _mensaje(self, i, j):
+        # m_{i→j}: potencial de i por los mensajes entrantes (salvo el de j), sumando fuera del separador
+        separador = tuple(v for v in self.cliques[i] if v in self.cliques[j])
+        operandos = self._potencial_con_evidencia(i)
+        for k in self.vecinos[i]:
+            if k != j:
+                operandos.append((self._separador(k, i), self.mensajes[(k, i)]))
+        mensaje = _einsum_nombrado(operandos, separador)
+        total = mensaje.sum()
+        self.mensajes[(i, j)] = mensaje / total if total > 0 else mensaje
+        self.mensajes_calculados += 1
+
+    def _separador(self, i, j):
+        return tuple(v for v in self.cliques[i] if v in self.cliques[j])
+
+    def _distribuir(self, origen):
+        # Mensajes que salen de `origen` hacia las hojas (recorrido en anchura)
+        pendientes = [(origen, j) for j in self.vecinos[origen]]
+        while pendientes:
+            i, j = pendientes.pop(0)
+            self._mensaje(i, j)
+            pendientes.extend((j, k) for k in self.vecinos[j] if k != i)
+
+    def _recolectar(self, i, padre=None):
+        # Mensajes de las hojas hacia la raíz (recorrido en profundidad)
+        for k in self.vecinos[i]:
+            if k != padre:
+                self._recolectar(k, i)
+                self._mensaje(k, i)
+
+    def propagar(self, evidencia):
+        """
+        Calibra el árbol para `evidencia` (variable -> valor). Si respecto a la
+        evidencia anterior solo cambia una variable, solo se rehacen los
+        mensajes que salen de su clique anfitriona.
+        """
+        cambiadas = {v for v in set(evidencia) | set(self.evidencia)
+                     if evidencia.get(v) != self.evidencia.get(v)}
+        self.evidencia = dict(evidencia)
+        if not self.mensajes or len(cambiadas) > 1:
+            self.mensajes = {}
+            self._recolectar(0)
+            self._distribuir(0)
+        elif cambiadas:
+            self._distribuir(self.anfitrion[cambiadas.pop()])
+        return self
+
+    def marginales(self):
+        # P(v | evidencia) para todas las variables a partir de las creencias de cada clique
+        resultado = {}
+        for i, c in enumerate(self.cliques):
+            pendientes = [v for v in c if v not in resultado]
+            if not pendientes:
+                continue
+            operandos = self._potencial_con_evidencia(i)
+            operandos += [(self._separador(k, i), self.mensajes[(k, i)]) for k in self.vecinos[i]]
+            creencia = _einsum_nombrado(operandos, c)
+            for v in pendientes:
+                eje = c.index(v)
+                m = creencia.sum(axis=tuple(a for a in range(len(c)) if a != eje))
+                resultado[v] = dict(zip(self.valores[v], m / m.sum()))
+        return resultado
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    # La red de este ejemplo: Enfermedad -> Fiebre, Enfermedad -> Tos
+    valores = {"E": ["Sí", "No"], "F": ["Sí", "No"], "T": ["Sí", "No"]}
+    padres = {"E": [], "F": ["E"], "T": ["E"]}
+    cpts = {"E": [P_E, 1 - P_E],
+            "F": [[P_F_given_E, 1 - P_F_given_E], [P_F_given_not_E, 1 - P_F_given_not_E]],
+            "T": [[P_T_given_E, 1 - P_T_given_E], [P_T_given_not_E, 1 - P_T_given_not_E]]}
+    arbol = ArbolUniones.compilar(valores, padres, cpts)
+    ruta = os.path.join(tempfile.mkdtemp(), "red.npz")
+    arbol.guardar(ruta)
+    arbol = ArbolUniones.cargar(ruta)
+    observacion = {"F": "Sí" if fiebre else "No", "T": "Sí" if tos else "No"}
+    p = arbol.propagar(observacion).marginales()["E"]["Sí"]
+    print(f"\n🌳 Árbol de uniones: P(E | síntomas) = {p:.2%} (Bayes directo: {probabilidad_enfermo_dado_sintomas:.2%})")
+
+    # Red más grande: 60 variables; comparamos propagación completa e incremental
+    rng = np.random.default_rng(0)
+    valores, padres, cpts = {}, {}, {}
+    for i in range(60):
+        previos = list(range(max(0, i - 6), i))
+        k = min(len(previos), int(rng.integers(0, 3)))
+        padres[f"X{i}"] = [f"X{j}" for j in rng.choice(previos, size=k, replace=False)] if k else []
+        valores[f"X{i}"] = [0, 1]
+        cpts[f"X{i}"] = rng.dirichlet([1, 1], size=(2,) * k)
+    arbol = ArbolUniones.compilar(valores, padres, cpts)
+    inicio = time.perf_counter()
+    arbol.propagar({"X59": 1, "X30": 0})
+    completa, n_completa = time.perf_counter() - inicio, arbol.mensajes_calculados
+    inicio = time.perf_counter()
+    arbol.propagar({"X59": 0, "X30": 0})
+    incremental = time.perf_counter() - inicio
+    print(f"🌳 {len(arbol.cliques)} cliques: propagación completa {n_completa} mensajes en {completa * 1000:.1f} ms, "
+          f"incremental {arbol.mensajes_calculados - n_completa} mensajes en {incremental * 1000:.1f} ms")